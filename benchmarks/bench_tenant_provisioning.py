@@ -0,0 +1,137 @@
+#!/usr/bin/python
+
+'''
+Tenant provisioning throughput benchmark.
+
+Runs the signup and activation path of the api_tenant role (TenantProvisioner
+and MasterAPI from playbooks/module_utils/threescale.py) against a local fake
+3scale master and reports tenants per minute, p50/p95/p99 per step and API
+calls per tenant, ie:
+
+  $ python benchmarks/bench_tenant_provisioning.py --tenants 300 --workers 4 --latency signup=250 --latency activate=40
+'''
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'playbooks', 'module_utils'))
+
+# module_utils/threescale.py only depends on the standard library
+import threescale  # noqa: E402
+from fake_master import FakeMaster, add_injection_arguments, step_values  # noqa: E402
+
+
+def run(args):
+    ''' provision args.tenants tenants and return the report '''
+    server = None
+    master_url = args.master_url
+    if master_url is None:
+        server = FakeMaster(latency_ms=step_values(args.latency, float),
+                            jitter_ms=args.jitter,
+                            error_rate=step_values(args.error, float)).start()
+        master_url = server.url
+
+    store_dir = tempfile.mkdtemp(prefix='bench_tenant_provisioning-')
+    try:
+        api = threescale.MasterAPI(master_url, args.access_token,
+                                   timeout=args.timeout, pool_size=args.workers)
+        provisioner = threescale.TenantProvisioner(
+            api,
+            threescale.TenantStore(store_dir),
+            threescale.TenantJournal(os.path.join(store_dir, 'journal.log')))
+
+        tenants = [{'org_name': 'bench{:04d}'.format(counter),
+                    'username': 'api{:04d}'.format(counter),
+                    'password': 'admin',
+                    'email': 'bench+{}@example.com'.format(counter)}
+                   for counter in range(1, args.tenants + 1)]
+
+        latencies = []
+
+        def timed(tenant):
+            start = time.time()
+            result = provisioner.create(tenant)
+            latencies.append(time.time() - start)
+            return result
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(timed, tenants))
+        elapsed = time.time() - start
+        api.close()
+    finally:
+        shutil.rmtree(store_dir)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    metrics = api.metrics()
+    succeeded = len([result for result in results if not result['errors']])
+    ordered = sorted(latencies)
+    calls = sum([endpoint['calls'] for endpoint in metrics.values()])
+
+    report = {
+        'tenants': args.tenants,
+        'workers': args.workers,
+        'succeeded': succeeded,
+        'failed': args.tenants - succeeded,
+        'elapsed_s': round(elapsed, 3),
+        'tenants_per_minute': round(succeeded / elapsed * 60, 1) if elapsed else 0,
+        'api_calls': calls,
+        'api_calls_per_tenant': round(float(calls) / args.tenants, 2) if args.tenants else 0,
+        'tenant_ms': {'p50': round(threescale.percentile(ordered, 50) * 1000, 1),
+                      'p95': round(threescale.percentile(ordered, 95) * 1000, 1),
+                      'p99': round(threescale.percentile(ordered, 99) * 1000, 1)},
+        'steps': metrics,
+    }
+    if server is not None:
+        report['server_connections'] = server.connections
+
+    return report
+
+
+def print_report(report):
+    ''' human readable report '''
+    print('tenants          {succeeded}/{tenants} ok, {failed} failed, {workers} worker(s)'.format(**report))
+    print('elapsed          {elapsed_s} s'.format(**report))
+    print('throughput       {tenants_per_minute} tenants/min'.format(**report))
+    print('api calls        {api_calls} ({api_calls_per_tenant} per tenant)'.format(**report))
+    if 'server_connections' in report:
+        print('connections      {server_connections}'.format(**report))
+    print('tenant           p50 {p50} ms  p95 {p95} ms  p99 {p99} ms'.format(**report['tenant_ms']))
+    for endpoint, metric in sorted(report['steps'].items()):
+        print('{:<56} calls {calls:<5} errors {errors:<4} p50 {p50_ms} ms  p95 {p95_ms} ms  p99 {p99_ms} ms'.format(
+            endpoint, **metric))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tenant provisioning throughput benchmark')
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='tenants provisioned concurrently; see tenant_signup_workers')
+    parser.add_argument('--timeout', type=int, default=20)
+    parser.add_argument('--master-url', default=None,
+                        help='benchmark an already running (fake) master instead of an in-process one')
+    parser.add_argument('--access-token', default='wtqhhsly')
+    parser.add_argument('--json', default=None, metavar='FILE', help='also write the report as json')
+    add_injection_arguments(parser)
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as jfd:
+            json.dump(report, jfd, indent=2, sort_keys=True)
+
+    return 1 if report['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/python
+
+'''
+Fake 3scale master API for benchmarking tenant provisioning.
+
+Serves the endpoints the api_tenant role uses:
+
+  POST   /master/api/providers.xml                            signup
+  PUT    /admin/api/accounts/<id>/users/<id>/activate.xml     activate
+  GET    /admin/api/accounts.xml                              providers
+  DELETE /master/api/providers/<id>.xml                       delete
+
+Latency and errors can be injected per step.  Run it standalone to point
+the playbooks at it, ie:
+
+  $ python benchmarks/fake_master.py --port 8080 --latency signup=300 --error signup=0.01
+  $ ansible-playbook playbooks/api_tenant.yml -e master_api_url=http://127.0.0.1:8080 ...
+'''
+
+import argparse
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+SIGNUP = 'signup'
+ACTIVATE = 'activate'
+PROVIDERS = 'providers'
+DELETE = 'delete'
+STEPS = (SIGNUP, ACTIVATE, PROVIDERS, DELETE)
+
+ROUTES = [('POST', re.compile(r'^/master/api/providers\.xml$'), SIGNUP),
+          ('PUT', re.compile(r'^/admin/api/accounts/(\d+)/users/(\d+)/activate\.xml$'), ACTIVATE),
+          ('GET', re.compile(r'^/admin/api/accounts\.xml$'), PROVIDERS),
+          ('DELETE', re.compile(r'^/master/api/providers/(\d+)\.xml$'), DELETE)]
+
+SIGNUP_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<signup>
+  <account>
+    <id>{account_id}</id>
+    <org_name>{org_name}</org_name>
+    <users>
+      <user>
+        <id>{user_id}</id>
+        <state>pending</state>
+        <role>admin</role>
+        <username>{username}</username>
+        <email>{email}</email>
+      </user>
+    </users>
+  </account>
+  <access_token>
+    <value>{access_token}</value>
+  </access_token>
+</signup>
+'''
+
+
+class FakeMaster(ThreadingMixIn, HTTPServer):
+    ''' In-memory 3scale master with configurable latency and error injection '''
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency_ms=None, jitter_ms=0, error_rate=None):
+        HTTPServer.__init__(self, address, FakeMasterHandler)
+        self.latency_ms = latency_ms or {}
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate or {}
+        self.accounts = {}
+        self.calls = dict((step, 0) for step in STEPS)
+        self.errors = dict((step, 0) for step in STEPS)
+        self.connections = 0
+        self._next_id = 2
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        ''' base url of the fake master '''
+        return 'http://{}:{}'.format(*self.server_address[:2])
+
+    def next_id(self):
+        ''' allocate an id '''
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def inject(self, step):
+        ''' sleep for the configured latency; return True when an error must be returned '''
+        delay = self.latency_ms.get(step, 0)
+        if self.jitter_ms:
+            delay = max(0, random.gauss(delay, self.jitter_ms))
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        failed = random.random() < self.error_rate.get(step, 0)
+        with self._lock:
+            self.calls[step] += 1
+            if failed:
+                self.errors[step] += 1
+        return failed
+
+    def start(self):
+        ''' serve from a background thread '''
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+
+class FakeMasterHandler(BaseHTTPRequestHandler):
+    ''' Request handler of the fake master '''
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server._lock:
+            self.server.connections += 1
+
+    def _reply(self, status, content=''):
+        body = content.encode('utf-8')
+        head = 'HTTP/1.1 {} {}\r\nContent-Type: application/xml\r\nContent-Length: {}\r\n\r\n'.format(
+            status, self.responses.get(status, ('',))[0], len(body))
+        # headers and body in one write, so that the client never waits on a delayed ACK
+        self.wfile.write(head.encode('ascii') + body)
+
+    def _form(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        params = parse_qs(self.rfile.read(length).decode('utf-8'))
+        params.update(parse_qs(urlparse(self.path).query))
+        return dict((key, value[0]) for key, value in params.items())
+
+    def _dispatch(self):
+        path = urlparse(self.path).path
+        for method, pattern, step in ROUTES:
+            match = pattern.match(path)
+            if method == self.command and match:
+                break
+        else:
+            self._form()
+            return self._reply(404, '<error>Not found</error>')
+
+        form = self._form()
+        if self.server.inject(step):
+            return self._reply(503, '<error>injected failure</error>')
+
+        return getattr(self, 'do_' + step)(form, *match.groups())
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def do_signup(self, form):
+        account_id = self.server.next_id()
+        user_id = self.server.next_id()
+        tenant = {'account_id': account_id,
+                  'user_id': user_id,
+                  'org_name': form.get('org_name', ''),
+                  'username': form.get('username', ''),
+                  'email': form.get('email', ''),
+                  'access_token': '{:016x}'.format(random.getrandbits(64))}
+        with self.server._lock:
+            self.server.accounts[str(account_id)] = tenant
+        self._reply(201, SIGNUP_XML.format(**tenant))
+
+    def do_activate(self, form, account_id, user_id):
+        if account_id not in self.server.accounts:
+            return self._reply(404, '<error>Not found</error>')
+        self._reply(200, '<user><id>{}</id><state>active</state></user>'.format(user_id))
+
+    def do_providers(self, form):
+        page, per_page = int(form.get('page', 1)), int(form.get('per_page', 500))
+        with self.server._lock:
+            accounts = sorted(self.server.accounts.values(), key=lambda item: item['account_id'])
+        accounts = accounts[(page - 1) * per_page:page * per_page]
+        self._reply(200, '<accounts>{}</accounts>'.format(''.join(
+            ['<account><id>{account_id}</id><org_name>{org_name}</org_name></account>'.format(**item)
+             for item in accounts])))
+
+    def do_delete(self, form, account_id):
+        with self.server._lock:
+            found = self.server.accounts.pop(account_id, None)
+        self._reply(200 if found else 404)
+
+
+def step_values(values, convert):
+    ''' parse repeated step=value arguments '''
+    rval = {}
+    for value in values or []:
+        step, _, number = value.partition('=')
+        if step not in STEPS:
+            raise argparse.ArgumentTypeError('unknown step {}; one of {}'.format(step, ', '.join(STEPS)))
+        rval[step] = convert(number)
+    return rval
+
+
+def add_injection_arguments(parser):
+    ''' command line options shared with the benchmark '''
+    parser.add_argument('--latency', action='append', metavar='STEP=MS',
+                        help='mean latency of a step in ms (repeatable); steps: ' + ', '.join(STEPS))
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS',
+                        help='standard deviation of the injected latency in ms')
+    parser.add_argument('--error', action='append', metavar='STEP=RATE',
+                        help='fraction of calls of a step answered with 503 (repeatable)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake 3scale master API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_injection_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeMaster((args.host, args.port),
+                        latency_ms=step_values(args.latency, float),
+                        jitter_ms=args.jitter,
+                        error_rate=step_values(args.error, float))
+    print('fake 3scale master listening on {}'.format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
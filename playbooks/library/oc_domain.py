@@ -0,0 +1,137 @@
+#!/usr/bin/python
+
+import fcntl
+import json
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import OpenShiftCLI
+
+
+class OCDomain(OpenShiftCLI):
+    ''' Discovers the wildcard domain of the cluster routes
+
+        The domain is read from the cluster ingress config (OpenShift 4) or, when
+        that is not readable, from the router generated host of the console route.
+        Results are memoized in a json file keyed by the API server url of the
+        current context.
+    '''
+    console_route = 'console'
+    console_namespace = 'openshift-console'
+
+    def __init__(self,
+                 cache_file,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for OCDomain '''
+        super(OCDomain, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.cache_file = os.path.expanduser(cache_file)
+
+    def server(self):
+        ''' API server url of the current context; read from the kubeconfig, no API call '''
+        rval = self.openshift_cmd(['whoami', '--show-server'], output=True, output_type='raw')
+        if rval['returncode'] != 0:
+            return None
+        return rval['results'].strip()
+
+    def _jsonpath(self, cmd, path):
+        rval = self.openshift_cmd(cmd + ['-o', 'jsonpath={}'.format(path)], output=True, output_type='raw')
+        if rval['returncode'] != 0:
+            return ''
+        return rval['results'].strip()
+
+    def discover(self):
+        ''' (domain, source) with one get in the common case '''
+        domain = self._jsonpath(['get', 'ingresses.config.openshift.io', 'cluster'], '{.spec.domain}')
+        if domain:
+            return domain, 'ingress'
+
+        # only a router generated host, <name>-<namespace>.<domain>, tells the domain; a custom one does not
+        prefix = '{}-{}.'.format(self.console_route, self.console_namespace)
+        host = self._jsonpath(['get', 'route', self.console_route, '-n', self.console_namespace], '{.spec.host}')
+        if host.startswith(prefix) and len(host) > len(prefix):
+            return host[len(prefix):], 'route'
+
+        return None, None
+
+    def _lock(self):
+        directory = os.path.dirname(self.cache_file)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        lfd = open(self.cache_file + '.lock', 'w')
+        fcntl.flock(lfd, fcntl.LOCK_EX)
+        return lfd
+
+    def _cache(self):
+        if not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as cfd:
+                return json.load(cfd)
+        except ValueError:
+            return {}
+
+    def _save(self, cache):
+        with open(self.cache_file + '.tmp', 'w') as cfd:
+            json.dump(cache, cfd, indent=2, sort_keys=True)
+        os.rename(self.cache_file + '.tmp', self.cache_file)
+
+    def resolve(self, refresh=False):
+        ''' cached or discovered domain of the current cluster '''
+        server = self.server()
+
+        lfd = self._lock()
+        try:
+            cache = self._cache()
+            if server and not refresh and cache.get(server):
+                return {'domain': cache[server], 'server': server, 'source': 'cache'}
+
+            domain, source = self.discover()
+            if domain and server:
+                cache[server] = domain
+                self._save(cache)
+
+            return {'domain': domain, 'server': server, 'source': source}
+        finally:
+            fcntl.flock(lfd, fcntl.LOCK_UN)
+            lfd.close()
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_domain module'''
+
+        ocdomain = OCDomain(params['cache_file'],
+                            oc_binary=params['oc_binary'],
+                            verbose=params['debug'])
+
+        rval = ocdomain.resolve(refresh=params['refresh'])
+        if not rval['domain']:
+            return {'failed': True, 'msg': 'Could not discover the wildcard domain of {}, pass ocp_domain'.format(
+                rval['server'])}
+
+        rval['changed'] = False
+        return rval
+
+
+def main():
+    '''
+    ansible module to discover the wildcard domain of the cluster routes
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            debug=dict(default=False, type='bool'),
+            cache_file=dict(default='~/.cache/3scale_multitenant/ocp_domain.json', type='str'),
+            refresh=dict(default=False, type='bool'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = OCDomain.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.openshift_template import TemplateProcessError
+from ansible.module_utils.openshift_template import TemplateProcessor
+from ansible.module_utils.template_patch import TemplatePatch
+
+
+class OCProcess(TemplateProcessor):
+    ''' Class to process OpenShift templates locally and apply the result in one call '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_process module'''
+
+        ocprocess = OCProcess(params['namespace'],
+                              oc_binary=params['oc_binary'],
+                              verbose=params['debug'])
+
+        state = params['state']
+        try:
+            template = Utils.get_resource_file(params['template'])
+            # each instance is one processing of the template; all of them go into the same oc apply
+            instances = [dict(params['params'] or {}, **instance) for instance in params['instances'] or [{}]]
+            # a rerun must not replace the generated passwords and tokens of the live secrets
+            objects, live, regenerated = ocprocess.resolve(template, instances, params['labels'],
+                                                           live=state == 'present')
+        except (IOError, OSError, TemplateProcessError) as err:
+            return {'failed': True, 'msg': str(err)}
+
+        # oc_template_patch edits, selecting the processed objects by their final names
+        if params['edits']:
+            patch = TemplatePatch({'items': objects})
+            unmatched = TemplatePatch.unmatched(objects, params['edits'])
+            if unmatched:
+                return {'failed': True, 'msg': 'Edits did not match any object', 'unmatched': unmatched}
+            patch.apply(params['edits'])
+
+        OCProcess.keep_live(objects, live)
+
+        #####
+        # Get
+        #####
+        if state == 'list':
+            kinds, _ = OCProcess.summarize(objects)
+            return {'changed': False, 'objects': kinds, 'items': objects, 'state': state}
+
+        ########
+        # Apply
+        ########
+        if state == 'present':
+            if check_mode:
+                kinds, _ = OCProcess.summarize(objects)
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have applied the objects.',
+                        'objects': kinds}
+
+            api_rval = ocprocess.apply(objects)
+            if api_rval['returncode'] != 0:
+                return {'failed': True, 'msg': api_rval}
+
+            kinds, actions = OCProcess.summarize(objects, api_rval['results'])
+            changed = bool(set(actions) - set(['unchanged']))
+
+            return {'changed': changed, 'objects': kinds, 'actions': actions,
+                    'regenerated': sorted(regenerated), 'stdout': api_rval['results'], 'state': state}
+
+        return {'failed': True, 'msg': 'Unknown state passed. %s' % state}
+
+
+def main():
+    '''
+    ansible module to process an OpenShift template and apply its objects
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            state=dict(default='present', type='str', choices=['present', 'list']),
+            debug=dict(default=False, type='bool'),
+            namespace=dict(required=True, type='str'),
+            template=dict(required=True, type='path'),
+            params=dict(default=None, type='dict'),
+            instances=dict(default=None, type='list'),
+            labels=dict(default=None, type='dict'),
+            edits=dict(default=None, type='list'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = OCProcess.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
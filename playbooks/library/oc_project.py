@@ -1,8 +1,14 @@
 #!/usr/bin/python
 
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.openshift import OpenShiftCLIConfig
 from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.project_teardown import ProjectTeardown
+from ansible.module_utils.project_teardown import ProjectTeardownError
 from ansible.module_utils.yedit import Yedit
 
 class ProjectConfig(OpenShiftCLIConfig):
@@ -63,18 +69,21 @@ class OCProject(OpenShiftCLI):
         '''delete the object'''
         return self._delete(self.kind, self.config.name)
 
-    def create(self):
+    def create(self, skip_config_write=False):
         '''create a project '''
         cmd = ['new-project', self.config.name]
         cmd.extend(self.config.to_option_list())
+        # concurrent new-project calls would all rewrite the current context of the kubeconfig
+        if skip_config_write:
+            cmd.append('--skip-config-write')
 
         return self.openshift_cmd(cmd, oadm=False)
 
     @staticmethod
-    def run_ansible(params, check_mode):
-
-        pconfig = ProjectConfig(
-            params['name'],
+    def config(params, name):
+        ''' ProjectConfig of one project of the module params '''
+        return ProjectConfig(
+            name,
             'None',
             params['oc_binary'],
             {
@@ -82,7 +91,94 @@ class OCProject(OpenShiftCLI):
                 'display_name': {'value': params['display_name'], 'include': True},
             },
         )
-        
+
+    @staticmethod
+    def run_many(params, check_mode):
+        ''' create or delete several projects concurrently; with wait, deletions are followed until done '''
+        names = sorted(set(params['names'] if params['names'] is not None else [params['name']]))
+        projects = dict((name, OCProject(OCProject.config(params, name), verbose=params['debug'])) for name in names)
+        state = params['state']
+
+        with ThreadPoolExecutor(max_workers=params['max_workers']) as pool:
+            gets = dict(zip(names, pool.map(lambda name: projects[name].get(), names)))
+        failed = dict((name, rval) for name, rval in gets.items() if rval['returncode'] != 0)
+        if failed:
+            return {'failed': True, 'msg': failed}
+        existing = [name for name in names if gets[name]['results']]
+
+        #####
+        # Get
+        #####
+        if state == 'list':
+            return {'changed': False,
+                    'ansible_module_results': dict((name, rval['results']) for name, rval in gets.items()),
+                    'state': state}
+
+        ########
+        # Delete
+        ########
+        if state == 'absent':
+            if check_mode:
+                return {'changed': bool(existing), 'msg': 'CHECK_MODE: Would have deleted {}.'.format(existing)}
+
+            teardown = ProjectTeardown(existing, oc_binary=params['oc_binary'], verbose=params['debug'])
+            try:
+                teardown.run(params['max_workers'], params['timeout'], wait=params['wait'])
+            except ProjectTeardownError as err:
+                return {'failed': True, 'msg': str(err), 'timings': teardown.timings()}
+            if teardown.errors:
+                return {'failed': True, 'msg': teardown.errors}
+
+            return {'changed': bool(teardown.deleted),
+                    'deleted': sorted(teardown.deleted),
+                    'absent': sorted(set(names) - set(existing)),
+                    'elapsed_s': round(time.time() - teardown.start, 1) if teardown.start else 0,
+                    'timings': teardown.timings(),
+                    'state': state}
+
+        ########
+        # Create
+        ########
+        if state == 'present':
+            terminating = [name for name in existing
+                           if gets[name]['results'].get('status', {}).get('phase') == 'Terminating']
+            if terminating and not params['wait']:
+                return {'failed': True, 'msg': 'Project(s) still terminating: {}'.format(', '.join(terminating))}
+
+            missing = [name for name in names if name not in existing or name in terminating]
+            if check_mode:
+                return {'changed': bool(missing), 'msg': 'CHECK_MODE: Would have created {}.'.format(missing)}
+
+            if terminating:
+                teardown = ProjectTeardown(terminating, oc_binary=params['oc_binary'], verbose=params['debug'])
+                try:
+                    teardown.terminate(params['timeout'])
+                except ProjectTeardownError as err:
+                    return {'failed': True, 'msg': str(err)}
+
+            with ThreadPoolExecutor(max_workers=params['max_workers']) as pool:
+                creates = dict(zip(missing, pool.map(
+                    lambda name: projects[name].create(skip_config_write=len(missing) > 1), missing)))
+            failed = dict((name, rval) for name, rval in creates.items()
+                          if rval['returncode'] != 0 and 'AlreadyExists' not in rval.get('stderr', ''))
+            if failed:
+                return {'failed': True, 'msg': failed}
+
+            return {'changed': bool(missing),
+                    'created': missing,
+                    'waited_for': terminating,
+                    'state': state}
+
+        return {'failed': True, 'msg': 'Unknown state passed. %s' % state}
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+
+        if params['names'] is not None or params['wait']:
+            return OCProject.run_many(params, check_mode)
+
+        pconfig = OCProject.config(params, params['name'])
+
         oadm_project = OCProject(pconfig, verbose=params['debug'])
 
         state = params['state']
@@ -145,13 +241,19 @@ def main():
         state=dict(default='present', type='str',
                    choices=['present', 'absent', 'list']),
         debug=dict(default=False, type='bool'),
-        name=dict(default=None, require=True, type='str'),
+        name=dict(default=None, type='str'),
+        names=dict(default=None, type='list'),
         display_name=dict(default=None, type='str'),
         description=dict(default=None, type='str'),
+        max_workers=dict(default=10, type='int'),
+        wait=dict(default=False, type='bool'),
+        timeout=dict(default=600, type='int'),
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[['name', 'names']],
+        required_one_of=[['name', 'names']],
         supports_check_mode=True
     )
 
@@ -1,81 +1,83 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.openshift import OpenShiftCLIConfig
-from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.openshift import OpenShiftCLIError
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.project import ProjectAnnotate
 
-class ProjectConfig(OpenShiftCLIConfig):
 
-    def __init__(self, rname, oc_binary, project_options):
-        super(ProjectConfig, self).__init__(rname, None, oc_binary, project_options)
+class OCProjectAnnotate(ProjectAnnotate):
+    ''' Class to annotate one or many projects, see ProjectAnnotate '''
 
-class OCProject(OpenShiftCLI):
-
-    def __init__(self,
-                 config,
-                 verbose=False):
-        ''' Constructor for OCProject '''
-        super(OCProject, self).__init__(None, config.oc_binary)
-        self.config = config
-
-    def annotate(self):
-        '''annotate the project'''
-        cmd = ['annotate', 'namespace', self.config.name, self.config.config_options['annotations']['value']]
-        cmd.extend(['--overwrite'])
-        return self.openshift_cmd(cmd, oadm=False)
-
-    
     @staticmethod
     def run_ansible(params, check_mode):
+        '''run the oc_project_annotate module'''
 
-        pConfig = ProjectConfig(
-            params['name'],
-            params['oc_binary'],
-            {'annotations': {'value': params['annotations'], 'include': False},
-            },
-        )
+        try:
+            annotations = Utils.parse_annotations(params['annotations'])
+        except ValueError as err:
+            return {'failed': True, 'msg': str(err)}
 
-        project = OCProject(pConfig, params['debug'])
+        names = sorted(set([name for name in (params['names'] or [params['name']]) if name]))
 
         state = params['state']
-        
+
         if state == 'present':
-            ########
-            # Create
-            ########
+            if not names or not annotations:
+                return {'changed': False, 'annotated': {}, 'state': 'present'}
+
+            project = OCProjectAnnotate(names, oc_binary=params['oc_binary'], verbose=params['debug'])
+            try:
+                current = project.current()
+            except OpenShiftCLIError as err:
+                return {'failed': True, 'msg': str(err)}
+
+            missing = sorted(set(names) - set(current))
+            if missing:
+                return {'failed': True, 'msg': 'Projects not found: {}'.format(', '.join(missing))}
+
+            diff = OCProjectAnnotate.diff(current, annotations)
             if check_mode:
-                return {'changed': True, 'msg': 'CHECK_MODE: would have performed a create'}
-            
-            api_rval = project.annotate()
-            
-            if api_rval['returncode'] != 0:
-                return {'failed': True, 'msg': api_rval}
+                return {'changed': bool(diff), 'msg': 'CHECK_MODE: Would have annotated {} project(s)'.format(
+                    len(diff)), 'annotated': diff}
+
+            if diff:
+                # setting an annotation to the value it already has is a no-op, one call fits all
+                api_rval = project.annotate(sorted(diff), annotations)
+                if api_rval['returncode'] != 0:
+                    return {'failed': True, 'msg': api_rval, 'annotated': diff}
+
+            return {'changed': bool(diff), 'annotated': diff, 'state': 'present'}
 
-            return {'changed': True, 'ansible_module_results': api_rval, state: 'present'}
-        
-        return {'failed': True, 'changed': False, 'ansible_module_results': 'Unknown state passed. %s' % state, state: 'unknown'}
+        return {'failed': True, 'changed': False, 'msg': 'Unknown state passed. %s' % state}
 
 
 def main():
+    '''
+    ansible module to annotate projects
+    '''
     module_args = dict(
-        oc_binary=dict(default=None, require=True, type='str'),
+        oc_binary=dict(default='oc', type='str'),
         state=dict(default='present', type='str',
-                   choices=['present', 'absent', 'list']),
+                   choices=['present']),
         debug=dict(default=False, type='bool'),
-        name=dict(default=None, require=True, type='str'),
-        annotations=dict(default=None, type='str'),
+        name=dict(default=None, type='str'),
+        names=dict(default=None, type='list'),
+        annotations=dict(default=None, type='raw'),
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[['name', 'names']],
+        required_one_of=[['name', 'names']],
         supports_check_mode=True
     )
 
-    rval = OCProject.run_ansible(module.params, module.check_mode)
+    rval = OCProjectAnnotate.run_ansible(module.params, module.check_mode)
     if 'failed' in rval:
         return module.fail_json(**rval)
 
     return module.exit_json(**rval)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
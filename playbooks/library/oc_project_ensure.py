@@ -0,0 +1,112 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import OpenShiftCLIError
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.project import ProjectAnnotate
+from ansible.module_utils.project import ProjectEnsure
+from ansible.module_utils.project_teardown import ProjectTeardown
+from ansible.module_utils.project_teardown import ProjectTeardownError
+
+
+class OCProjectEnsure(ProjectEnsure):
+    ''' Class to ensure a project with its admin and annotations, see ProjectEnsure '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_project_ensure module'''
+
+        try:
+            annotations = Utils.parse_annotations(params['annotations'])
+        except ValueError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        admin = (params['admin'] or '').strip()
+        rolebinding_name = params['rolebinding_name'] or '{}-{}'.format(admin, params['admin_role'])
+
+        project = OCProjectEnsure(params['name'], oc_binary=params['oc_binary'], verbose=params['debug'])
+
+        try:
+            namespace = project.get_namespace()
+        except OpenShiftCLIError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        terminating = OCProjectEnsure.terminating(namespace)
+        if terminating and not params['wait']:
+            return {'failed': True, 'msg': 'Project {} is still terminating'.format(params['name'])}
+        create = namespace is None or terminating
+
+        current = {} if create else namespace.get('metadata', {}).get('annotations') or {}
+        annotate = ProjectAnnotate.diff({params['name']: current}, annotations).get(params['name'], {})
+
+        bind = False
+        if admin:
+            if create:
+                bind = True
+            else:
+                try:
+                    bind = not OCProjectEnsure.binds(project.get_rolebinding(rolebinding_name),
+                                                     admin, params['admin_role'])
+                except OpenShiftCLIError as err:
+                    return {'failed': True, 'msg': str(err)}
+
+        actions = [action for action, needed in (('create', create),
+                                                 ('annotate', bool(annotate)),
+                                                 ('bind', bind)) if needed]
+        if check_mode:
+            return {'changed': bool(actions), 'msg': 'CHECK_MODE: Would have performed {}.'.format(actions),
+                    'actions': actions, 'annotations': annotate}
+
+        if terminating:
+            teardown = ProjectTeardown([params['name']], oc_binary=params['oc_binary'], verbose=params['debug'])
+            try:
+                teardown.terminate(params['timeout'])
+            except ProjectTeardownError as err:
+                return {'failed': True, 'msg': str(err)}
+
+        for action in actions:
+            if action == 'create':
+                api_rval = project.create(params['display_name'], params['description'])
+            elif action == 'annotate':
+                api_rval = ProjectAnnotate([params['name']], oc_binary=params['oc_binary'],
+                                           verbose=params['debug']).annotate([params['name']], annotate)
+            else:
+                api_rval = project.bind(admin, params['admin_role'], rolebinding_name)
+            if api_rval['returncode'] != 0:
+                return {'failed': True, 'msg': api_rval, 'actions': actions}
+
+        return {'changed': bool(actions),
+                'actions': actions,
+                'annotations': annotate,
+                'state': 'present'}
+
+
+def main():
+    '''
+    ansible module to ensure a project with its admin and annotations
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            debug=dict(default=False, type='bool'),
+            name=dict(required=True, type='str'),
+            display_name=dict(default=None, type='str'),
+            description=dict(default=None, type='str'),
+            admin=dict(default=None, type='str'),
+            admin_role=dict(default='admin', type='str'),
+            rolebinding_name=dict(default=None, type='str'),
+            annotations=dict(default=None, type='raw'),
+            wait=dict(default=True, type='bool'),
+            timeout=dict(default=600, type='int'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = OCProjectEnsure.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python
+
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.rollout import RolloutError
+from ansible.module_utils.rollout import RolloutScheduler
+
+
+class OCRollout(RolloutScheduler):
+    ''' Class to resume deployment configs and wait for them, see RolloutScheduler '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_rollout module'''
+
+        state = params['state']
+        graph = params['graph'] or dict((name, []) for name in params['names'] or [])
+
+        scheduler = OCRollout(params['namespace'],
+                              graph,
+                              oc_binary=params['oc_binary'],
+                              verbose=params['debug'])
+
+        #########
+        # Resume
+        #########
+        if state == 'resumed':
+            if check_mode:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have resumed the deployment configs.',
+                        'names': sorted(graph)}
+            try:
+                revisions = scheduler.resume(sorted(graph))
+            except RolloutError as err:
+                return {'failed': True, 'msg': str(err)}
+
+            return {'changed': bool(scheduler.patched), 'previous_revisions': revisions, 'state': state}
+
+        ########
+        # Ready
+        ########
+        try:
+            waves = scheduler.waves()
+        except RolloutError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        if check_mode:
+            return {'changed': True, 'msg': 'CHECK_MODE: Would have resumed the deployment configs.',
+                    'waves': waves}
+
+        try:
+            scheduler.run(params['timeout'])
+        except RolloutError as err:
+            if params['report'] and scheduler.start is not None:
+                scheduler.report(params['report'])
+            return {'failed': True, 'msg': str(err),
+                    'timings': scheduler.timings(), 'critical_path': scheduler.critical_path()}
+
+        if params['report']:
+            scheduler.report(params['report'])
+
+        return {'changed': bool(scheduler.patched),
+                'state': state,
+                'elapsed_s': round(time.time() - scheduler.start, 1),
+                'timings': scheduler.timings(),
+                'critical_path': scheduler.critical_path(),
+                'report': params['report']}
+
+
+def main():
+    '''
+    ansible module to resume deployment configs following their dependencies
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            debug=dict(default=False, type='bool'),
+            namespace=dict(required=True, type='str'),
+            state=dict(default='ready', type='str', choices=['ready', 'resumed']),
+            graph=dict(default=None, type='dict'),
+            names=dict(default=None, type='list'),
+            timeout=dict(default=1800, type='int'),
+            report=dict(default=None, type='path'),
+        ),
+        mutually_exclusive=[['graph', 'names']],
+        required_one_of=[['graph', 'names']],
+        supports_check_mode=True,
+    )
+
+    rval = OCRollout.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -6,83 +6,57 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.yedit import Yedit
 from ansible.module_utils.openshift import Utils
 from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.route import RouteBatch
+from ansible.module_utils.route import RouteConfig
+from ansible.module_utils.route import RouteError
+from ansible.module_utils.router_shard import RouterShardError
+from ansible.module_utils.router_shard import RouterShards
+
+class OCRouteBatch(RouteBatch):
+    ''' Class to create or update several routes of a namespace at once, see RouteBatch '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        ''' run the oc_route module for a list of routes '''
+        shards = None
+        if params['router_shards']:
+            shards = RouterShards(params['router_shards'],
+                                  label=params['router_shard_label'],
+                                  strategy=params['router_shard_strategy'],
+                                  assignments=params['router_shard_assignments'])
+            try:
+                shards.validate()
+            except RouterShardError as err:
+                return {'failed': True, 'msg': str(err)}
+
+        try:
+            configs, route_shards = OCRouteBatch.from_routes(params['routes'],
+                                                             params['namespace'],
+                                                             params['oc_binary'],
+                                                             shards=shards,
+                                                             shard_domain=params['router_shard_domain'])
+            batch = OCRouteBatch(params['namespace'], configs, oc_binary=params['oc_binary'],
+                                 verbose=params['debug'])
+            actions, conflicts, pending = batch.ensure(params['update'], check_mode, params['admission_timeout'])
+        except RouteError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        if check_mode:
+            return {'changed': bool(pending), 'msg': 'CHECK_MODE: Would have applied {}.'.format(pending),
+                    'routes': actions, 'conflicts': conflicts}
+
+        hosts = dict((config.name, config.host) for config in configs)
+        rval = {'changed': any([name not in conflicts for name in pending]),
+                'routes': dict((name, {'action': action, 'host': hosts[name]}) for name, action in actions.items()),
+                'conflicts': conflicts,
+                'state': 'present'}
+        if shards:
+            rval['shards'] = route_shards
+        if conflicts and params['fail_on_conflict']:
+            rval.update({'failed': True, 'msg': 'Route conflicts: {}'.format(
+                '; '.join(['{}: {}'.format(name, error) for name, error in sorted(conflicts.items())]))})
+        return rval
 
-class RouteConfig(object):
-    ''' Handle route options '''
-    # pylint: disable=too-many-arguments
-    def __init__(self,
-                 sname,
-                 namespace,
-                 oc_binary,
-                 labels=None,
-                 destcacert=None,
-                 cacert=None,
-                 cert=None,
-                 key=None,
-                 host=None,
-                 tls_termination=None,
-                 service_name=None,
-                 wildcard_policy=None,
-                 weight=None,
-                 port=None):
-        ''' constructor for handling route options '''
-        self.oc_binary = oc_binary
-        self.name = sname
-        self.namespace = namespace
-        self.labels = labels
-        self.host = host
-        self.tls_termination = tls_termination
-        self.destcacert = destcacert
-        self.cacert = cacert
-        self.cert = cert
-        self.key = key
-        self.service_name = service_name
-        self.port = port
-        self.data = {}
-        self.wildcard_policy = wildcard_policy
-        if wildcard_policy is None:
-            self.wildcard_policy = 'None'
-        self.weight = weight
-        if weight is None:
-            self.weight = 100
-
-        self.create_dict()
-
-    def create_dict(self):
-        ''' return a service as a dict '''
-        self.data['apiVersion'] = 'v1'
-        self.data['kind'] = 'Route'
-        self.data['metadata'] = {}
-        self.data['metadata']['name'] = self.name
-        self.data['metadata']['namespace'] = self.namespace
-        if self.labels:
-            self.data['metadata']['labels'] = self.labels
-        self.data['spec'] = {}
-
-        self.data['spec']['host'] = self.host
-
-        if self.tls_termination:
-            self.data['spec']['tls'] = {}
-
-            self.data['spec']['tls']['termination'] = self.tls_termination
-
-            if self.tls_termination != 'passthrough':
-                self.data['spec']['tls']['key'] = self.key
-                self.data['spec']['tls']['caCertificate'] = self.cacert
-                self.data['spec']['tls']['certificate'] = self.cert
-
-            if self.tls_termination == 'reencrypt':
-                self.data['spec']['tls']['destinationCACertificate'] = self.destcacert
-
-        self.data['spec']['to'] = {'kind': 'Service',
-                                   'name': self.service_name,
-                                   'weight': self.weight}
-
-        self.data['spec']['wildcardPolicy'] = self.wildcard_policy
-
-        if self.port:
-            self.data['spec']['port'] = {}
-            self.data['spec']['port']['targetPort'] = self.port
 
 # pylint: disable=too-many-instance-attributes,too-many-public-methods
 class Route(Yedit):
@@ -233,6 +207,11 @@ class OCRoute(OpenShiftCLI):
                    }
             check_mode: does the module support check mode.  (module.check_mode)
         '''
+        if params['routes'] is not None:
+            if params['state'] != 'present':
+                return {'failed': True, 'msg': 'routes is only supported with state present.'}
+            return OCRouteBatch.run_ansible(params, check_mode)
+
         files = {'destcacert': {'path': params['dest_cacert_path'],
                                 'content': params['dest_cacert_content'],
                                 'value': None, },
@@ -366,7 +345,7 @@ def main():
                        choices=['present', 'absent', 'list']),
             debug=dict(default=False, type='bool'),
             labels=dict(default=None, type='dict'),
-            name=dict(default=None, required=True, type='str'),
+            name=dict(default=None, type='str'),
             namespace=dict(default=None, required=True, type='str'),
             tls_termination=dict(default=None, type='str'),
             dest_cacert_path=dict(default=None, type='str'),
@@ -383,11 +362,21 @@ def main():
             weight=dict(default=None, type='int'),
             port=dict(default=None, type='int'),
             update=dict(default=False, type='bool'),
+            routes=dict(default=None, type='list'),
+            fail_on_conflict=dict(default=True, type='bool'),
+            admission_timeout=dict(default=30, type='int'),
+            router_shards=dict(default=None, type='list'),
+            router_shard_label=dict(default='router-shard', type='str'),
+            router_shard_strategy=dict(default='hash', type='str', choices=['hash', 'tenant']),
+            router_shard_assignments=dict(default=None, type='dict'),
+            router_shard_domain=dict(default=None, type='str'),
         ),
         mutually_exclusive=[('dest_cacert_path', 'dest_cacert_content'),
                             ('cacert_path', 'cacert_content'),
                             ('cert_path', 'cert_content'),
-                            ('key_path', 'key_content'), ],
+                            ('key_path', 'key_content'),
+                            ('name', 'routes'), ],
+        required_one_of=[['name', 'routes']],
         supports_check_mode=True,
     )
 
@@ -0,0 +1,217 @@
+#!/usr/bin/python
+
+import copy
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.router_shard import RouterShardError
+from ansible.module_utils.router_shard import RouterShards
+
+
+class OCRouterShard(OpenShiftCLI):
+    ''' Class to configure router shards and rebalance the routes of the tenants over them
+
+        present:     one IngressController per shard, applied with one oc apply
+        list:        shard of each tenant namespace, from its labelled routes
+        rebalanced:  relabels (and moves the hosts of) the routes of the tenants
+                     whose shard changed, with one get and one oc apply
+
+        Moving a host breaks every client of the old one, ie: the staging and
+        production Public Base URLs of the tenant in 3scale, so host changes
+        are only applied with move_hosts and returned per tenant.
+    '''
+
+    def __init__(self,
+                 shards,
+                 domain=None,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for OCRouterShard '''
+        super(OCRouterShard, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.shards = shards
+        self.domain = domain
+
+    def apply(self, objects):
+        ''' submit the objects, of any namespace, as one List to oc apply '''
+        fname = Utils.create_tmp_file_from_contents('oc_router_shard-',
+                                                    {'apiVersion': 'v1', 'kind': 'List', 'items': objects},
+                                                    ftype='json')
+        return self.openshift_cmd(['apply', '-f', fname], output=True, output_type='raw')
+
+    def routes(self):
+        ''' sharded routes of every namespace, with one get '''
+        rval = self.openshift_cmd(['get', 'route', '--all-namespaces', '-l', self.shards.label, '-o', 'json'],
+                                  output=True)
+        if rval['returncode'] != 0:
+            raise RouterShardError('could not get the sharded routes: {}'.format(rval.get('stderr', '')))
+        return rval['results'].get('items', [])
+
+    def current(self, routes):
+        ''' {namespace: shard} from the labels of the routes '''
+        current = {}
+        for route in routes:
+            namespace = route['metadata']['namespace']
+            shard = route['metadata'].get('labels', {}).get(self.shards.label)
+            # a tenant split over several shards is moved as a whole
+            if current.get(namespace, shard) != shard:
+                shard = None
+            current[namespace] = shard
+        return current
+
+    def moved(self, routes, moves):
+        ''' (routes of the moved tenants, relabelled and with the host of their new shard,
+             {namespace: [{route, from, to}]} of the hosts that change)
+        '''
+        objects = []
+        hosts = {}
+        for route in routes:
+            namespace = route['metadata']['namespace']
+            if namespace not in moves:
+                continue
+            shard = moves[namespace]['to']
+            labels = dict(route['metadata'].get('labels', {}), **self.shards.labels(namespace))
+            spec = copy.deepcopy(route['spec'])
+            if self.domain and spec.get('host'):
+                old = route['metadata'].get('labels', {}).get(self.shards.label)
+                spec['host'] = RouterShards.host(RouterShards.unshard(spec['host'], self.domain, old),
+                                                 self.domain, shard)
+                if spec['host'] != route['spec']['host']:
+                    hosts.setdefault(namespace, []).append({'route': route['metadata']['name'],
+                                                            'from': route['spec']['host'],
+                                                            'to': spec['host']})
+            objects.append({'apiVersion': 'route.openshift.io/v1',
+                            'kind': 'Route',
+                            'metadata': {'name': route['metadata']['name'],
+                                         'namespace': namespace,
+                                         'labels': labels},
+                            'spec': spec})
+        return objects, hosts
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_router_shard module'''
+
+        shards = RouterShards(params['shards'],
+                              label=params['label'],
+                              strategy=params['strategy'],
+                              assignments=params['assignments'])
+        try:
+            shards.validate()
+        except RouterShardError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        ocshard = OCRouterShard(shards,
+                                domain=params['domain'],
+                                oc_binary=params['oc_binary'],
+                                verbose=params['debug'])
+
+        state = params['state']
+
+        ########
+        # Create
+        ########
+        if state == 'present':
+            if not params['domain']:
+                return {'failed': True, 'msg': 'domain is required when state is present.'}
+
+            objects = shards.ingress_controllers(params['domain'],
+                                                 replicas=params['replicas'],
+                                                 exclude_default=params['exclude_default'])
+            if check_mode:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have applied the router shards.',
+                        'objects': objects}
+
+            api_rval = ocshard.apply(objects)
+            if api_rval['returncode'] != 0:
+                return {'failed': True, 'msg': api_rval}
+
+            actions = [line.split()[-1] for line in api_rval['results'].splitlines() if line.split()]
+            return {'changed': bool(set(actions) - set(['unchanged'])),
+                    'objects': objects,
+                    'stdout': api_rval['results'],
+                    'state': state}
+
+        try:
+            routes = ocshard.routes()
+        except RouterShardError as err:
+            return {'failed': True, 'msg': str(err)}
+        current = ocshard.current(routes)
+
+        #####
+        # Get
+        #####
+        if state == 'list':
+            return {'changed': False,
+                    'tenants': current,
+                    'distribution': shards.distribution(current),
+                    'moves': shards.moves(current),
+                    'state': state}
+
+        ###########
+        # Rebalance
+        ###########
+        if state == 'rebalanced':
+            moves = shards.moves(current)
+            target = dict(current, **dict((namespace, move['to']) for namespace, move in moves.items()))
+            rval = {'moves': moves,
+                    'distribution': shards.distribution(target),
+                    'state': state}
+            if not moves:
+                rval['changed'] = False
+                return rval
+
+            objects, hosts = ocshard.moved(routes, moves)
+            rval['hosts'] = hosts
+            if check_mode:
+                rval.update({'changed': True, 'msg': 'CHECK_MODE: Would have moved {} tenants.'.format(len(moves)),
+                             'routes': len(objects)})
+                return rval
+
+            # the tenants keep calling the old hosts until their Public Base URLs are updated
+            if hosts and not params['move_hosts']:
+                rval.update({'failed': True,
+                             'msg': 'Rebalancing changes the hosts of {} tenant(s); update their staging and '
+                                    'production Public Base URLs to the new hosts and set move_hosts.'.format(
+                                        len(hosts))})
+                return rval
+
+            api_rval = ocshard.apply(objects)
+            if api_rval['returncode'] != 0:
+                return {'failed': True, 'msg': api_rval, 'moves': moves}
+
+            rval.update({'changed': True, 'routes': len(objects)})
+            return rval
+
+        return {'failed': True, 'msg': 'Unknown state passed. %s' % state}
+
+
+def main():
+    '''
+    ansible module to configure router shards and rebalance tenant routes over them
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            state=dict(default='present', type='str', choices=['present', 'list', 'rebalanced']),
+            debug=dict(default=False, type='bool'),
+            shards=dict(required=True, type='list'),
+            label=dict(default='router-shard', type='str'),
+            strategy=dict(default='hash', type='str', choices=['hash', 'tenant']),
+            assignments=dict(default=None, type='dict'),
+            domain=dict(default=None, type='str'),
+            replicas=dict(default=2, type='int'),
+            exclude_default=dict(default=False, type='bool'),
+            move_hosts=dict(default=False, type='bool'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = OCRouterShard.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
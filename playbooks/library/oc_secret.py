@@ -1,8 +1,6 @@
 #!/usr/bin/python
 
 import base64
-import json
-import atexit
 import os
 
 from ansible.module_utils.basic import AnsibleModule
@@ -84,11 +82,7 @@ class OCSecret(OpenShiftCLI):
         if secret['returncode'] != 0:
             return secret
 
-        sfile_path = '/tmp/%s' % self.name
-        with open(sfile_path, 'w') as sfd:
-            sfd.write(json.dumps(secret['results']))
-
-        atexit.register(Utils.cleanup, [sfile_path])
+        sfile_path = Utils.create_tmp_file_from_contents(self.name + '-', secret['results'], ftype='json')
 
         return self._replace(sfile_path, force=force)
 
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+import copy
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.template_patch import TemplatePatch
+from ansible.module_utils.yedit import Yedit
+from ansible.module_utils.yedit import YeditException
+
+
+class OCTemplatePatch(TemplatePatch):
+    ''' Class to patch an OpenShift template file, see TemplatePatch '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the oc_template_patch module'''
+
+        dest = params['dest'] or params['src']
+
+        try:
+            content = Utils.get_resource_file(params['src'])
+        except (IOError, OSError) as err:
+            return {'failed': True, 'msg': 'Could not read {}: {}'.format(params['src'], err)}
+
+        patch = OCTemplatePatch(content)
+        unmatched = OCTemplatePatch.unmatched(patch.objects, params['edits'])
+        if unmatched and params['fail_on_unmatched']:
+            return {'failed': True, 'msg': 'Edits did not match any object', 'unmatched': unmatched}
+
+        changed = patch.apply(copy.deepcopy(params['edits']))
+
+        if not changed and dest == params['src']:
+            return {'changed': False, 'objects': {}, 'unmatched': unmatched, 'dest': dest}
+
+        if check_mode:
+            return {'changed': True, 'msg': 'CHECK_MODE: Would have patched the template.',
+                    'objects': changed, 'unmatched': unmatched}
+
+        try:
+            Yedit(dest, content=patch.content).write()
+        except YeditException as err:
+            return {'failed': True, 'msg': str(err)}
+
+        return {'changed': bool(changed) or dest != params['src'],
+                'objects': changed, 'unmatched': unmatched, 'dest': dest}
+
+
+def main():
+    '''
+    ansible module to patch OpenShift templates
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            src=dict(required=True, type='path'),
+            dest=dict(default=None, type='path'),
+            edits=dict(required=True, type='list'),
+            fail_on_unmatched=dict(default=True, type='bool'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = OCTemplatePatch.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
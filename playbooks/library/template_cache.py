@@ -0,0 +1,172 @@
+#!/usr/bin/python
+
+import fcntl
+import hashlib
+import json
+import os
+import ssl
+import time
+
+try:
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError, URLError
+except ImportError:
+    from urllib2 import Request, urlopen, HTTPError, URLError
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+class TemplateCache(object):
+    ''' Content addressed local cache of OpenShift templates
+
+        <cache_dir>/<version>/index.json maps each url to the sha256, ETag and
+        Last-Modified of its current content; the content itself is stored as
+        <cache_dir>/<version>/<sha256>-<file name>.
+    '''
+
+    def __init__(self, cache_dir, version, validate_certs=True, timeout=30):
+        self.path = os.path.join(os.path.expanduser(cache_dir), version)
+        self.index_file = os.path.join(self.path, 'index.json')
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+
+    def _lock(self):
+        ''' exclusive lock shared by every play using this cache '''
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        lfd = open(self.index_file + '.lock', 'w')
+        fcntl.flock(lfd, fcntl.LOCK_EX)
+        return lfd
+
+    def _index(self):
+        if not os.path.isfile(self.index_file):
+            return {}
+        with open(self.index_file) as ifd:
+            return json.load(ifd)
+
+    def _save_index(self, index):
+        with open(self.index_file + '.tmp', 'w') as ifd:
+            json.dump(index, ifd, indent=2, sort_keys=True)
+        os.rename(self.index_file + '.tmp', self.index_file)
+
+    def blob(self, url, sha256):
+        ''' path of the cached content of url '''
+        return os.path.join(self.path, '{}-{}'.format(sha256, os.path.basename(url.split('?')[0]) or 'template'))
+
+    def _fetch(self, url, entry):
+        ''' conditional GET; returns (status, content, headers) '''
+        req = Request(url)
+        if entry and entry.get('etag'):
+            req.add_header('If-None-Match', entry['etag'])
+        if entry and entry.get('last_modified'):
+            req.add_header('If-Modified-Since', entry['last_modified'])
+
+        context = ssl.create_default_context()
+        if not self.validate_certs:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+        try:
+            resp = urlopen(req, timeout=self.timeout, context=context)
+            return resp.getcode(), resp.read(), resp.info()
+        except HTTPError as err:
+            if err.code == 304:
+                return 304, None, err.info()
+            raise
+
+    def resolve(self, url, max_age=0, offline=False):
+        ''' return the cache entry of url, downloading or revalidating it when needed '''
+        lfd = self._lock()
+        try:
+            index = self._index()
+            entry = index.get(url)
+            cached = entry is not None and os.path.isfile(self.blob(url, entry['sha256']))
+
+            if cached and (offline or time.time() - entry['fetched'] < max_age):
+                return dict(entry, path=self.blob(url, entry['sha256']), source='cache')
+
+            if offline:
+                raise IOError('{} is not cached in {} and offline is set'.format(url, self.path))
+
+            try:
+                status, content, headers = self._fetch(url, entry if cached else None)
+            except (HTTPError, URLError, IOError) as err:
+                if cached:
+                    return dict(entry, path=self.blob(url, entry['sha256']), source='cache',
+                                warning='revalidation failed, using cached copy: {}'.format(err))
+                raise
+
+            if status == 304:
+                entry['fetched'] = int(time.time())
+                index[url] = entry
+                self._save_index(index)
+                return dict(entry, path=self.blob(url, entry['sha256']), source='revalidated')
+
+            sha256 = hashlib.sha256(content).hexdigest()
+            blob = self.blob(url, sha256)
+            if not os.path.isfile(blob):
+                with open(blob + '.tmp', 'wb') as bfd:
+                    bfd.write(content)
+                os.rename(blob + '.tmp', blob)
+
+            source = 'revalidated' if cached and entry['sha256'] == sha256 else 'download'
+            entry = {'url': url,
+                     'sha256': sha256,
+                     'etag': headers.get('ETag'),
+                     'last_modified': headers.get('Last-Modified'),
+                     'fetched': int(time.time())}
+            index[url] = entry
+            self._save_index(index)
+
+            return dict(entry, path=blob, source=source)
+        finally:
+            fcntl.flock(lfd, fcntl.LOCK_UN)
+            lfd.close()
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the template_cache module'''
+
+        cache = TemplateCache(params['cache_dir'],
+                              params['version'],
+                              validate_certs=params['validate_certs'],
+                              timeout=params['timeout'])
+
+        try:
+            entry = cache.resolve(params['url'],
+                                  max_age=params['max_age'],
+                                  offline=params['offline'] or check_mode)
+        except (HTTPError, URLError, IOError, OSError, ValueError) as err:
+            if check_mode and not params['offline']:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have downloaded {}'.format(params['url'])}
+            return {'failed': True, 'msg': 'Could not resolve {}: {}'.format(params['url'], err)}
+
+        entry['changed'] = entry['source'] == 'download'
+        return entry
+
+
+def main():
+    '''
+    ansible module for the local template cache
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            url=dict(required=True, type='str'),
+            version=dict(required=True, type='str'),
+            cache_dir=dict(default='~/.cache/3scale_multitenant/templates', type='str'),
+            max_age=dict(default=3600, type='int'),
+            offline=dict(default=False, type='bool'),
+            validate_certs=dict(default=True, type='bool'),
+            timeout=dict(default=30, type='int'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = TemplateCache.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/python
+
+import math
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import Utils
+
+
+class CapacityProfile(object):
+    ''' Sizes the API Manager deployments from the expected load
+
+        Requests of each container are base + per_tenant * tenants
+        + per_gateway * gateways + per_rps * rps (cpu in millicores, memory
+        in Mi), multiplied by the headroom; limits are requests times the
+        burst factor of the resource, memory capped at max_memory (the max of the
+        container limitrange of the namespace).  Replicas are 1 + tenants / tenants_per_replica
+        and / or rps / rps_per_replica.  Only the named container of each deployment
+        config is sized.
+
+        With a template, the totals are those of every container (init containers
+        included) of every deployment config of it, times its replicas; they must fit
+        in the quota.
+    '''
+    burst = {'cpu': 4, 'memory': 1.5}
+    round_to = {'cpu': 10, 'memory': 32}
+    units = {'cpu': 'm', 'memory': 'Mi'}
+    # quantity suffixes, in millicores for cpu and Mi for memory
+    scale = {'cpu': {'': 1000, 'm': 1},
+             'memory': {'': 1.0 / 2 ** 20, 'k': 1000.0 / 2 ** 20, 'M': 1e6 / 2 ** 20, 'G': 1e9 / 2 ** 20,
+                        'T': 1e12 / 2 ** 20, 'Ki': 1.0 / 1024, 'Mi': 1, 'Gi': 1024, 'Ti': 1024 ** 2}}
+    re_quantity = re.compile(r'^([0-9.]+)([a-zA-Z]*)$')
+
+    components = {
+        # stats and rate limit counters of every application
+        'backend-redis': {'container': 'backend-redis',
+                          'cpu': (150, 0, 0, 0.5),
+                          'memory': (256, 4, 0, 1)},
+        # sidekiq queues and rails cache
+        'system-redis': {'container': 'system-redis',
+                         'cpu': (100, 0.2, 0, 0),
+                         'memory': (256, 2, 0, 0)},
+        # authrep calls of the gateways
+        'backend-listener': {'container': 'backend-listener',
+                             'cpu': (250, 0, 2, 1),
+                             'memory': (450, 0, 0, 0.5),
+                             'rps_per_replica': 500},
+        'backend-worker': {'container': 'backend-worker',
+                           'cpu': (100, 0, 0, 0.5),
+                           'memory': (64, 0, 0, 0.25),
+                           'rps_per_replica': 1000},
+        # admin portal and api, serving the configuration polled by the gateways;
+        # system-master and system-developer keep the sizing of the template
+        'system-app': {'container': 'system-provider',
+                       'cpu': (50, 0.5, 2, 0),
+                       'memory': (600, 1, 0, 0),
+                       'tenants_per_replica': 500},
+        'system-sidekiq': {'container': 'system-sidekiq',
+                           'cpu': (100, 0.5, 0, 0),
+                           'memory': (500, 1, 0, 0),
+                           'tenants_per_replica': 250},
+    }
+
+    def __init__(self, tenants, gateways, rps, headroom=1.0, max_memory=6144):
+        self.tenants = tenants
+        self.gateways = gateways
+        self.rps = rps
+        self.headroom = headroom
+        self.max = {'cpu': None, 'memory': max_memory}
+
+    def quantity(self, resource, value):
+        ''' round up and format a cpu (m) or memory (Mi) quantity '''
+        step = self.round_to[resource]
+        return '{}{}'.format(int(math.ceil(value / float(step)) * step), self.units[resource])
+
+    def request(self, coefficients):
+        ''' request of one container, before rounding '''
+        base, per_tenant, per_gateway, per_rps = coefficients
+        return (base + per_tenant * self.tenants + per_gateway * self.gateways + per_rps * self.rps) * self.headroom
+
+    def replicas(self, component):
+        ''' replicas of a deployment config '''
+        replicas = 1
+        if component.get('tenants_per_replica'):
+            replicas = max(replicas, 1 + self.tenants // component['tenants_per_replica'])
+        if component.get('rps_per_replica'):
+            replicas = max(replicas, int(math.ceil(self.rps / float(component['rps_per_replica']))))
+        return replicas
+
+    def compute(self):
+        ''' {deployment config: {replicas, requests, limits}} '''
+        profile = {}
+        for name, component in self.components.items():
+            requests = {}
+            limits = {}
+            for resource in ('cpu', 'memory'):
+                value = self.request(component[resource])
+                limit = value * self.burst[resource]
+                if self.max[resource]:
+                    limit = min(limit, self.max[resource])
+                    value = min(value, limit)
+                requests[resource] = self.quantity(resource, value)
+                limits[resource] = self.quantity(resource, limit)
+            profile[name] = {'container': component['container'],
+                             'replicas': self.replicas(component),
+                             'requests': requests,
+                             'limits': limits}
+        return profile
+
+    @staticmethod
+    def edits(profile):
+        ''' oc_template_patch edits applying the profile '''
+        return [{'kind': 'DeploymentConfig',
+                 'name': name,
+                 'container': sizing['container'],
+                 'replicas': sizing['replicas'],
+                 'resources': {'requests': sizing['requests'], 'limits': sizing['limits']}}
+                for name, sizing in sorted(profile.items())]
+
+    @staticmethod
+    def parse(resource, quantity):
+        ''' millicores of a cpu quantity, Mi of a memory quantity '''
+        match = CapacityProfile.re_quantity.match(str(quantity))
+        if not match or match.group(2) not in CapacityProfile.scale[resource]:
+            raise ValueError('invalid {} quantity: {}'.format(resource, quantity))
+        return float(match.group(1)) * CapacityProfile.scale[resource][match.group(2)]
+
+    @staticmethod
+    def format(totals):
+        ''' totals as cpu (m) and memory (Mi) quantities '''
+        return dict((section, dict((resource, '{}{}'.format(int(math.ceil(value)), CapacityProfile.units[resource]))
+                                   for resource, value in values.items()))
+                    for section, values in totals.items())
+
+    @staticmethod
+    def totals(profile):
+        ''' requests and limits of all replicas of the profiled containers '''
+        totals = {}
+        for section in ('requests', 'limits'):
+            totals[section] = {}
+            for resource in ('cpu', 'memory'):
+                totals[section][resource] = sum([CapacityProfile.parse(resource, sizing[section][resource]) *
+                                                 sizing['replicas'] for sizing in profile.values()])
+        return CapacityProfile.format(totals)
+
+    @staticmethod
+    def pod(spec, section, resource):
+        ''' request or limit of a pod: the sum of its containers, at least its largest init container '''
+        def value(container):
+            quantity = (container.get('resources') or {}).get(section, {}).get(resource)
+            return CapacityProfile.parse(resource, quantity) if quantity is not None else 0
+
+        return max([sum([value(container) for container in spec.get('containers') or []])] +
+                   [value(container) for container in spec.get('initContainers') or []])
+
+    @staticmethod
+    def template_totals(template):
+        ''' requests and limits of all replicas of every container of the deployment configs of a template '''
+        totals = dict((section, {'cpu': 0, 'memory': 0}) for section in ('requests', 'limits'))
+        for obj in template.get('objects') or template.get('items') or []:
+            if obj.get('kind') != 'DeploymentConfig':
+                continue
+            replicas = int(obj.get('spec', {}).get('replicas', 1))
+            spec = obj.get('spec', {}).get('template', {}).get('spec', {})
+            for section, values in totals.items():
+                for resource in values:
+                    values[resource] += CapacityProfile.pod(spec, section, resource) * replicas
+        return CapacityProfile.format(totals)
+
+    @staticmethod
+    def exceeded(totals, quota):
+        ''' {requests.cpu: {total, quota}} of the totals over the quota '''
+        rval = {}
+        for key, hard in sorted((quota or {}).items()):
+            section, _, resource = key.partition('.')
+            if hard in (None, '') or resource not in CapacityProfile.units or section not in totals:
+                continue
+            if CapacityProfile.parse(resource, totals[section][resource]) > CapacityProfile.parse(resource, hard):
+                rval[key] = {'total': totals[section][resource], 'quota': str(hard)}
+        return rval
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the threescale_capacity_profile module'''
+
+        for param in ('tenants', 'gateways', 'rps'):
+            if params[param] < 0:
+                return {'failed': True, 'msg': '{} must not be negative'.format(param)}
+        if params['headroom'] <= 0:
+            return {'failed': True, 'msg': 'headroom must be positive'}
+
+        capacity = CapacityProfile(params['tenants'], params['gateways'], params['rps'],
+                                   headroom=params['headroom'], max_memory=params['max_memory'])
+        profile = capacity.compute()
+        rval = {'changed': False,
+                'profile': profile,
+                'edits': CapacityProfile.edits(profile),
+                'totals': CapacityProfile.totals(profile)}
+
+        if not params['template']:
+            return rval
+
+        try:
+            totals = CapacityProfile.template_totals(Utils.get_resource_file(params['template']))
+            exceeded = CapacityProfile.exceeded(totals, params['quota'])
+        except (IOError, OSError, ValueError) as err:
+            return {'failed': True, 'msg': str(err)}
+
+        rval.update({'totals': totals, 'exceeded': exceeded})
+        if exceeded:
+            rval.update({'failed': True, 'msg': 'The deployments of {} exceed the quota: {}'.format(
+                params['template'], ', '.join(['{} {} > {}'.format(key, value['total'], value['quota'])
+                                               for key, value in sorted(exceeded.items())]))})
+        return rval
+
+
+def main():
+    '''
+    ansible module to size the API Manager from the expected tenants, gateways and traffic
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            tenants=dict(required=True, type='int'),
+            gateways=dict(default=0, type='int'),
+            rps=dict(default=0, type='int'),
+            headroom=dict(default=1.0, type='float'),
+            max_memory=dict(default=6144, type='int'),
+            template=dict(default=None, type='path'),
+            quota=dict(default=None, type='dict'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = CapacityProfile.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.threescale_gateway import GatewayError
+from ansible.module_utils.threescale_gateway import GatewayProfile
+
+
+class ThreescaleGatewayProfile(GatewayProfile):
+    ''' Class to validate a gateway profile and render it for oc_secret, oc_process and oc_route, see GatewayProfile '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the threescale_gateway_profile module'''
+
+        names = dict((gateway, name) for gateway, name in (('stage', params['stage_name']),
+                                                            ('prod', params['prod_name'])) if name)
+        if not names:
+            return {'failed': True, 'msg': 'stage_name and / or prod_name is required.'}
+
+        profile = ThreescaleGatewayProfile(params['profile'],
+                                           overrides=params['overrides'],
+                                           names=names,
+                                           secret_name=params['secret_name'])
+        try:
+            settings = profile.validate()
+        except GatewayError as err:
+            return {'failed': True, 'msg': str(err)}
+
+        rval = {'changed': False,
+                'profile': params['profile'],
+                'settings': settings,
+                'instances': profile.instances(settings),
+                'edits': profile.edits(settings),
+                'warnings': profile.warnings(settings)}
+        if params['endpoint']:
+            rval['secret'] = profile.secret(params['endpoint'])
+        if params['namespace'] and params['domain']:
+            rval['routes'] = profile.routes(params['namespace'], params['domain'])
+        return rval
+
+
+def main():
+    '''
+    ansible module to render the secret, template parameters, edits and routes of a gateway profile
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            profile=dict(default='dev', type='str'),
+            overrides=dict(default=None, type='dict'),
+            stage_name=dict(default=None, type='str'),
+            prod_name=dict(default=None, type='str'),
+            secret_name=dict(default='apicast-configuration-url-secret', type='str'),
+            endpoint=dict(default=None, type='str'),
+            namespace=dict(default=None, type='str'),
+            domain=dict(default=None, type='str'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = ThreescaleGatewayProfile.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
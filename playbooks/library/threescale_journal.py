@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.threescale import TenantJournal
+
+
+class ThreeScaleJournal(object):
+    ''' Class to record and read completed tenant provisioning steps '''
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the threescale_journal module'''
+
+        journal = TenantJournal(params['path'])
+
+        state = params['state']
+
+        #####
+        # Get
+        #####
+        if state == 'list':
+            return {'changed': False, 'steps': journal.steps(), 'state': state}
+
+        if not params['org_name'] or not params['step']:
+            return {'failed': True, 'msg': 'org_name and step are required when state is present.'}
+
+        ########
+        # Record
+        ########
+        if state == 'present':
+            if params['step'] in journal.steps().get(params['org_name'], []):
+                return {'changed': False, 'state': state}
+
+            if check_mode:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have recorded the step.'}
+
+            journal.record(params['org_name'], params['step'])
+
+            return {'changed': True, 'state': state}
+
+        return {'failed': True, 'msg': 'Unknown state passed. %s' % state}
+
+
+def main():
+    '''
+    ansible module for the tenant provisioning journal
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(default='present', type='str', choices=['present', 'list']),
+            path=dict(required=True, type='str'),
+            org_name=dict(default=None, type='str'),
+            step=dict(default=None, type='str'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = ThreeScaleJournal.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/python
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.threescale import MasterAPI
+from ansible.module_utils.threescale import TenantJournal
+from ansible.module_utils.threescale import TenantProvisioner
+from ansible.module_utils.threescale import TenantStore
+from ansible.module_utils.threescale import ThreeScaleAPIError
+from ansible.module_utils.threescale_gateway import GatewayError
+from ansible.module_utils.threescale_gateway import GatewayProvisioner
+from ansible.module_utils.router_shard import RouterShardError
+from ansible.module_utils.router_shard import RouterShards
+
+
+class ThreeScaleTenant(OpenShiftCLI):
+    ''' Class to manage 3scale tenants through the master API '''
+
+    def __init__(self,
+                 api,
+                 store,
+                 journal=None,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for ThreeScaleTenant '''
+        super(ThreeScaleTenant, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.api = api
+        self.store = store
+        self.journal = journal
+        self.provisioner = TenantProvisioner(api, store, journal)
+        self._providers = None
+
+    @property
+    def providers(self):
+        ''' provider index of the master, fetched once '''
+        if self._providers is None:
+            self._providers = self.api.providers()
+        return self._providers
+
+    def resolve(self, org_name):
+        '''return the account ids of a tenant; the tenant store wins over the provider index'''
+        account_id = self.store.account_id(org_name)
+        if account_id is not None:
+            return [account_id]
+
+        return self.providers.get(org_name, [])
+
+    def deploy_gateways(self, gateways, tenant, domain):
+        '''deploy the gateways of a signed up tenant and journal them'''
+        org_name = tenant['org_name']
+        rval = gateways.provision({'namespace': tenant.get('namespace') or org_name,
+                                   'admin_hostname': tenant.get('admin_hostname') or
+                                   '{}-admin.{}'.format(org_name, domain),
+                                   'access_token': tenant['access_token']})
+        if not rval['errors']:
+            self.provisioner.checkpoint(org_name, 'gateway')
+        return rval
+
+    def create(self, tenants, max_workers, gateways=None, gateway_workers=1, domain=None):
+        '''sign up tenants; with gateways, each tenant's gateways are deployed as soon as it is signed up'''
+        deploys = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+                ThreadPoolExecutor(max_workers=gateway_workers) as gateway_pool:
+            signups = [pool.submit(self.provisioner.create, item) for item in tenants]
+
+            for future in as_completed(signups):
+                result = future.result()
+                if gateways is not None and not result['errors'] and 'gateway' not in result['completed_steps']:
+                    deploys[result['org_name']] = gateway_pool.submit(self.deploy_gateways, gateways, result, domain)
+
+            results = [future.result() for future in signups]
+            for result in results:
+                if result['org_name'] not in deploys:
+                    continue
+                result['gateway'] = deploys[result['org_name']].result()
+                result['errors'].extend(result['gateway']['errors'])
+                result['changed'] = result['changed'] or result['gateway']['changed']
+                result['completed_steps'] = self.provisioner.completed(result['org_name'])
+
+        return results
+
+    def delete_namespace(self, namespace):
+        '''delete the gateway project of a tenant'''
+        results = self._delete('project', namespace)
+        results['deleted'] = results['returncode'] == 0
+        if results['returncode'] != 0 and 'not found' in results.get('stderr', ''):
+            results['returncode'] = 0
+
+        return results
+
+    def delete(self, tenant, delete_namespace):
+        '''delete one tenant and, optionally, its gateway namespace'''
+        rval = {'org_name': tenant['org_name'],
+                'account_ids': tenant['account_ids'],
+                'namespace': tenant['namespace'],
+                'changed': False,
+                'errors': []}
+
+        for account_id in tenant['account_ids']:
+            try:
+                # a tenant deleted by an earlier, partial run is absent already
+                if self.api.delete_provider(account_id):
+                    rval['changed'] = True
+            except ThreeScaleAPIError as err:
+                rval['errors'].append(str(err))
+
+        if not rval['errors']:
+            self.store.remove(tenant['org_name'])
+            if self.journal is not None:
+                self.journal.record(tenant['org_name'], TenantJournal.removed)
+
+        if delete_namespace and tenant['namespace']:
+            api_rval = self.delete_namespace(tenant['namespace'])
+            if api_rval['returncode'] != 0:
+                rval['errors'].append(api_rval)
+            elif api_rval['deleted']:
+                rval['changed'] = True
+
+        return rval
+
+    @staticmethod
+    def invalid(tenants, keys):
+        '''message about the tenants missing one of the keys, None when all of them have every key'''
+        for index, item in enumerate(tenants):
+            if not isinstance(item, dict):
+                return 'tenant #{} is not a dict'.format(index)
+            missing = [key for key in keys if not item.get(key)]
+            if missing:
+                return 'tenant {} lacks {}'.format(item.get('org_name') or '#{}'.format(index), ', '.join(missing))
+        return None
+
+    @staticmethod
+    def run_ansible(params, check_mode):
+        '''run the threescale_tenant module'''
+
+        api = MasterAPI(params['master_url'],
+                        params['access_token'],
+                        validate_certs=params['validate_certs'],
+                        timeout=params['timeout'],
+                        pool_size=params['max_workers'])
+
+        tenant = ThreeScaleTenant(api,
+                                  TenantStore(params['tenant_store']),
+                                  journal=TenantJournal(params['journal']) if params['journal'] else None,
+                                  oc_binary=params['oc_binary'],
+                                  verbose=params['debug'])
+
+        state = params['state']
+
+        ########
+        # Create
+        ########
+        if state == 'present':
+            if not params['tenant_store']:
+                return {'failed': True, 'msg': 'tenant_store is required when state is present.',
+                        'metrics': api.metrics()}
+
+            invalid = ThreeScaleTenant.invalid(params['tenants'], ('org_name', 'username', 'password', 'email'))
+            if invalid:
+                return {'failed': True, 'msg': invalid, 'metrics': api.metrics()}
+
+            gateways = None
+            if params['gateway_template']:
+                if not params['domain']:
+                    return {'failed': True, 'msg': 'domain is required with gateway_template.',
+                            'metrics': api.metrics()}
+                shards = None
+                if params['router_shards']:
+                    shards = RouterShards(params['router_shards'],
+                                          label=params['router_shard_label'],
+                                          strategy=params['router_shard_strategy'],
+                                          assignments=params['router_shard_assignments'])
+                try:
+                    if shards:
+                        shards.validate()
+                    gateways = GatewayProvisioner(params['gateway_template'],
+                                                  params['domain'],
+                                                  timeout=params['gateway_timeout'],
+                                                  report_dir=params['gateway_report_dir'],
+                                                  profile=params['gateway_profile'],
+                                                  profile_overrides=params['gateway_profile_overrides'],
+                                                  shards=shards,
+                                                  oc_binary=params['oc_binary'],
+                                                  verbose=params['debug'])
+                except (IOError, OSError) as err:
+                    return {'failed': True, 'msg': 'Could not read {}: {}'.format(params['gateway_template'], err),
+                            'metrics': api.metrics()}
+                except (GatewayError, RouterShardError) as err:
+                    return {'failed': True, 'msg': str(err), 'metrics': api.metrics()}
+
+            if check_mode:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have performed a create.',
+                        'metrics': api.metrics()}
+
+            results = tenant.create(params['tenants'],
+                                    params['max_workers'],
+                                    gateways=gateways,
+                                    gateway_workers=params['gateway_workers'],
+                                    domain=params['domain'])
+            api.close()
+
+            failed = [result for result in results if result['errors']]
+            if failed:
+                return {'failed': True, 'msg': 'Failed to create {} tenant(s)'.format(len(failed)),
+                        'tenants': results, 'metrics': api.metrics()}
+
+            return {'changed': any([result['changed'] for result in results]),
+                    'tenants': results, 'metrics': api.metrics(), 'state': state}
+
+        ########
+        # Delete
+        ########
+        if state == 'absent':
+            invalid = ThreeScaleTenant.invalid(params['tenants'], ('org_name',))
+            if invalid:
+                return {'failed': True, 'msg': invalid, 'metrics': api.metrics()}
+
+            tenants = []
+            try:
+                for item in params['tenants']:
+                    tenants.append({'org_name': item['org_name'],
+                                    'namespace': item.get('namespace', item['org_name']),
+                                    'account_ids': tenant.resolve(item['org_name'])})
+            except ThreeScaleAPIError as err:
+                return {'failed': True, 'msg': str(err), 'metrics': api.metrics()}
+
+            if check_mode:
+                return {'changed': True, 'msg': 'CHECK_MODE: Would have performed a delete.',
+                        'tenants': tenants, 'metrics': api.metrics()}
+
+            with ThreadPoolExecutor(max_workers=params['max_workers']) as pool:
+                results = list(pool.map(lambda item: tenant.delete(item, params['delete_namespaces']),
+                                        tenants))
+            api.close()
+
+            failed = [result for result in results if result['errors']]
+            if failed:
+                return {'failed': True, 'msg': 'Failed to delete {} tenant(s)'.format(len(failed)),
+                        'tenants': results, 'metrics': api.metrics()}
+
+            return {'changed': any([result['changed'] for result in results]),
+                    'tenants': results, 'metrics': api.metrics(), 'state': state}
+
+        return {'failed': True, 'msg': 'Unknown state passed. %s' % state, 'metrics': api.metrics()}
+
+
+def main():
+    '''
+    ansible module for 3scale tenants
+    '''
+    module = AnsibleModule(
+        argument_spec=dict(
+            oc_binary=dict(default='oc', type='str'),
+            state=dict(default='present', type='str', choices=['present', 'absent']),
+            debug=dict(default=False, type='bool'),
+            master_url=dict(required=True, type='str'),
+            access_token=dict(required=True, type='str', no_log=True),
+            tenants=dict(required=True, type='list'),
+            tenant_store=dict(default=None, type='str'),
+            journal=dict(default=None, type='str'),
+            delete_namespaces=dict(default=True, type='bool'),
+            max_workers=dict(default=10, type='int'),
+            validate_certs=dict(default=False, type='bool'),
+            timeout=dict(default=20, type='int'),
+            gateway_template=dict(default=None, type='path'),
+            domain=dict(default=None, type='str'),
+            gateway_workers=dict(default=4, type='int'),
+            gateway_timeout=dict(default=300, type='int'),
+            gateway_report_dir=dict(default=None, type='path'),
+            gateway_profile=dict(default='dev', type='str'),
+            gateway_profile_overrides=dict(default=None, type='dict'),
+            router_shards=dict(default=None, type='list'),
+            router_shard_label=dict(default='router-shard', type='str'),
+            router_shard_strategy=dict(default='hash', type='str', choices=['hash', 'tenant']),
+            router_shard_assignments=dict(default=None, type='dict'),
+        ),
+        supports_check_mode=True,
+    )
+
+    rval = ThreeScaleTenant.run_ansible(module.params, module.check_mode)
+    if 'failed' in rval:
+        return module.fail_json(**rval)
+
+    return module.exit_json(**rval)
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ try:
 except ImportError:
     import yaml
 
+from ansible.module_utils.six import string_types
 from ansible.module_utils.yedit import Yedit
 
 class OpenShiftCLIError(Exception):
@@ -294,11 +295,19 @@ class Utils(object):
 
         return tmpfile
 
+    @staticmethod
+    def scratch_dir():
+        ''' scratch arena of the current run (see roles/work_dir), None outside of a run '''
+        path = os.environ.get('THREESCALE_SCRATCH_DIR')
+        if path and os.path.isdir(path):
+            return path
+        return None
+
     @staticmethod
     def create_tmpfile(prefix='tmp'):
-        ''' Generates and returns a temporary file name '''
+        ''' Generates and returns a temporary file name, in the scratch arena when there is one '''
 
-        with tempfile.NamedTemporaryFile(prefix=prefix, delete=False) as tmp:
+        with tempfile.NamedTemporaryFile(prefix=prefix, dir=Utils.scratch_dir(), delete=False) as tmp:
             return tmp.name
 
     @staticmethod
@@ -396,6 +405,23 @@ class Utils(object):
             print('returning true')
         return True
 
+    @staticmethod
+    def parse_annotations(annotations):
+        ''' {key: value} of a dict or of a "key=value key=value" string '''
+        if not annotations:
+            return {}
+        if isinstance(annotations, dict):
+            return dict((key, str(value)) for key, value in annotations.items())
+        if isinstance(annotations, string_types):
+            parsed = {}
+            for item in annotations.split():
+                key, sep, value = item.partition('=')
+                if not sep or not key:
+                    raise ValueError('annotation {} is not key=value'.format(item))
+                parsed[key] = value
+            return parsed
+        raise ValueError('annotations must be a dict or a key=value string')
+
 class OpenShiftCLIConfig(object):
     '''Generic Config'''
     def __init__(self, rname, namespace, oc_binary, options):
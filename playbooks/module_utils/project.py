@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.openshift import OpenShiftCLIError
+
+
+class ProjectAnnotate(OpenShiftCLI):
+    ''' Class to annotate one or many projects
+
+        The annotations of every project are read with one get; the projects
+        with an annotation that differs are all annotated with one oc annotate,
+        the ones that already match are left alone.
+    '''
+
+    def __init__(self,
+                 names,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for ProjectAnnotate '''
+        super(ProjectAnnotate, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.names = list(names)
+
+    def current(self):
+        ''' {name: annotations} of the existing projects, with one get '''
+        rval = self.openshift_cmd(['get', 'namespace'] + self.names + ['-o', 'json'], output=True)
+        results = rval['results'] or {}
+        # a missing project fails the get but the others are still listed
+        if rval['returncode'] != 0 and 'not found' not in rval.get('stderr', ''):
+            raise OpenShiftCLIError(rval.get('stderr', rval['cmd']))
+
+        items = results.get('items', []) if results.get('kind') == 'List' else [results] if results else []
+        return dict((item['metadata']['name'], item['metadata'].get('annotations') or {}) for item in items)
+
+    @staticmethod
+    def diff(current, annotations):
+        ''' {name: {key: value}} of the annotations that differ on each project '''
+        rval = {}
+        for name, existing in current.items():
+            differs = dict((key, value) for key, value in annotations.items() if existing.get(key) != value)
+            if differs:
+                rval[name] = differs
+        return rval
+
+    def annotate(self, names, annotations):
+        ''' one oc annotate of the given annotations on every given project '''
+        cmd = ['annotate', 'namespace'] + list(names)
+        cmd.extend(['{}={}'.format(key, value) for key, value in sorted(annotations.items())])
+        cmd.append('--overwrite')
+        return self.openshift_cmd(cmd)
+
+
+class ProjectEnsure(OpenShiftCLI):
+    ''' Class to bring a project, its admin rolebinding and its annotations to the desired state
+
+        The project and the rolebinding are read with one get each (none for
+        the rolebinding of a project created by this call); only the missing
+        pieces are written: new-project, one annotate of the annotations that
+        differ (ProjectAnnotate) and one policy add-role-to-user.
+    '''
+
+    def __init__(self,
+                 name,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for ProjectEnsure '''
+        super(ProjectEnsure, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.name = name
+
+    def get_namespace(self):
+        ''' the namespace of the project, None when it does not exist '''
+        rval = self.openshift_cmd(['get', 'namespace', self.name, '-o', 'json'], output=True)
+        if rval['returncode'] == 0:
+            return rval['results']
+        if 'not found' in rval.get('stderr', ''):
+            return None
+        raise OpenShiftCLIError(rval.get('stderr', rval['cmd']))
+
+    def get_rolebinding(self, rolebinding_name):
+        ''' one rolebinding of the project by name, None when it does not exist '''
+        rval = self.openshift_cmd(['get', 'rolebinding', rolebinding_name, '-n', self.name, '-o', 'json'],
+                                  output=True)
+        if rval['returncode'] == 0:
+            return rval['results']
+        if 'not found' in rval.get('stderr', ''):
+            return None
+        raise OpenShiftCLIError(rval.get('stderr', rval['cmd']))
+
+    @staticmethod
+    def binds(rolebinding, user, role):
+        ''' does the rolebinding grant role to user '''
+        if not rolebinding or rolebinding.get('roleRef', {}).get('name') != role:
+            return False
+        return any([subject.get('kind') == 'User' and subject.get('name') == user
+                    for subject in rolebinding.get('subjects') or []]) or \
+            user in (rolebinding.get('userNames') or [])
+
+    @staticmethod
+    def terminating(namespace):
+        ''' is the namespace still being deleted '''
+        return namespace is not None and namespace.get('status', {}).get('phase') == 'Terminating'
+
+    def create(self, display_name=None, description=None, skip_config_write=False):
+        ''' oc new-project '''
+        cmd = ['new-project', self.name]
+        if display_name:
+            cmd.append('--display-name={}'.format(display_name))
+        if description:
+            cmd.append('--description={}'.format(description))
+        # concurrent new-project calls would all rewrite the current context of the kubeconfig
+        if skip_config_write:
+            cmd.append('--skip-config-write')
+        return self.openshift_cmd(cmd)
+
+    def bind(self, user, role, rolebinding_name):
+        ''' oc adm policy add-role-to-user '''
+        return self.openshift_cmd(['policy', 'add-role-to-user', role, user,
+                                   '--rolebinding-name', rolebinding_name, '-n', self.name], oadm=True)
@@ -0,0 +1,180 @@
+#!/usr/bin/python
+
+import os
+import select
+import subprocess
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.module_utils.openshift import OpenShiftCLI
+
+
+class ProjectTeardownError(Exception):
+    '''Exception class for project teardowns'''
+    pass
+
+
+class ProjectTeardown(OpenShiftCLI):
+    ''' Deletes projects concurrently and waits for all of them to terminate
+
+        Deleting a project cascades to everything inside it, so each project
+        is deleted directly; termination of every project is followed with a
+        single `oc get namespaces -w`, started before the deletes are fired.
+        Should the watch still miss a project, one list finds it once the
+        watch goes quiet.
+    '''
+    watch_template = '{.type}{" "}{.object.metadata.name}{"\\n"}'
+
+    def __init__(self,
+                 names,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for ProjectTeardown '''
+        super(ProjectTeardown, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.names = list(names)
+        self.deleted = {}
+        self.terminated = {}
+        self.errors = {}
+        self.start = None
+
+    def delete(self, name):
+        ''' delete one project; returns (name, deleted, error) '''
+        rval = self._delete('project', name)
+        if rval['returncode'] == 0:
+            return name, True, None
+        if 'not found' in rval.get('stderr', ''):
+            return name, False, None
+        # already terminating, ie: deleted by an earlier run
+        if 'ensuring all content is removed' in rval.get('stderr', ''):
+            return name, True, None
+        return name, False, rval.get('stderr', '').strip() or rval['cmd']
+
+    def delete_all(self, max_workers):
+        ''' fire the deletes of every project concurrently '''
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for name, deleted, error in pool.map(self.delete, self.names):
+                if error:
+                    self.errors[name] = error
+                elif deleted:
+                    self.deleted[name] = time.time()
+                else:
+                    self.terminated[name] = time.time()
+
+    def existing(self):
+        ''' names of the namespaces of the cluster, with one list '''
+        rval = self.openshift_cmd(['get', 'namespaces', '-o', 'jsonpath={.items[*].metadata.name}'],
+                                  output=True, output_type='raw')
+        if rval['returncode'] != 0:
+            raise ProjectTeardownError('could not list the namespaces: {}'.format(rval.get('stderr', '')))
+        return set(rval['results'].split())
+
+    def watch(self, deadline, quiet):
+        ''' yield (event type, namespace) from oc get namespaces -w; (None, None) after quiet seconds without events '''
+        cmds = [self.oc_binary, 'get', 'namespaces', '-w', '--output-watch-events',
+                '-o', 'jsonpath=' + self.watch_template]
+
+        while time.time() < deadline:
+            if self.verbose:
+                print(' '.join(cmds))
+            # stderr is not read while the watch runs; a pipe would fill up with warnings and block oc
+            errors = tempfile.TemporaryFile()
+            proc = subprocess.Popen(cmds, stdout=subprocess.PIPE, stderr=errors)
+            events = 0
+            buf = b''
+            try:
+                while True:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return
+                    readable, _, _ = select.select([proc.stdout], [], [], min(remaining, quiet))
+                    if not readable:
+                        yield None, None
+                        continue
+                    chunk = os.read(proc.stdout.fileno(), 65536)
+                    # the api server closes watches from time to time; start a new one
+                    if not chunk:
+                        break
+                    lines = (buf + chunk).split(b'\n')
+                    buf = lines.pop()
+                    for line in lines:
+                        fields = line.decode('utf-8').split(' ')
+                        if len(fields) != 2 or not fields[1]:
+                            continue
+                        events += 1
+                        yield fields[0], fields[1]
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+                errors.seek(0)
+                stderr = errors.read().decode('utf-8')
+                errors.close()
+
+            if proc.returncode != 0 and not events:
+                raise ProjectTeardownError('{} failed: {}'.format(' '.join(cmds), stderr))
+
+    def wait(self, events, timeout):
+        ''' wait until every deleted project is gone '''
+        pending = set(self.deleted) - set(self.terminated)
+        if not pending:
+            return
+
+        for event, name in events:
+            if event is None:
+                # the projects that terminated before the watch started, or while a closed watch
+                # was being restarted, never show up in it: check the namespaces on every quiet period
+                for gone in pending - self.existing():
+                    self.terminated[gone] = time.time()
+            elif event == 'DELETED' and name in pending:
+                self.terminated[name] = time.time()
+            pending = set(self.deleted) - set(self.terminated)
+            if not pending:
+                return
+
+        raise ProjectTeardownError('timed out after {}s waiting for the deletion of: {}'.format(
+            timeout, ', '.join(sorted(pending))))
+
+    def run(self, max_workers, timeout, wait=True, quiet=5):
+        ''' delete every project and, with wait, wait for all of them to terminate '''
+        self.start = time.time()
+        if not wait:
+            self.delete_all(max_workers)
+            return
+
+        events = self.watch(self.start + timeout, quiet)
+        try:
+            # the first event (or a quiet period) comes once the watch has listed the namespaces
+            next(events, None)
+            self.delete_all(max_workers)
+            self.wait(events, timeout)
+        finally:
+            events.close()
+
+    def terminate(self, timeout, quiet=5):
+        ''' wait for projects that are already being deleted, ie: Terminating '''
+        self.start = self.start or time.time()
+        events = self.watch(self.start + timeout, quiet)
+        try:
+            next(events, None)
+            # the ones that finished before the watch listed the namespaces
+            existing = self.existing()
+            now = time.time()
+            for name in self.names:
+                if name in existing:
+                    self.deleted[name] = now
+                else:
+                    self.terminated[name] = now
+            self.wait(events, timeout)
+        finally:
+            events.close()
+
+    def timings(self):
+        ''' seconds since the start at which each project was deleted and terminated '''
+        rval = {}
+        for name in self.names:
+            rval[name] = {'deleted_s': round(self.deleted[name] - self.start, 1) if name in self.deleted else None,
+                          'terminated_s': round(self.terminated[name] - self.start, 1)
+                                          if name in self.terminated else None}
+        return rval
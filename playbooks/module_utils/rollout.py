@@ -0,0 +1,280 @@
+#!/usr/bin/python
+
+import calendar
+import json
+import os
+import re
+import select
+import subprocess
+import tempfile
+import time
+
+from ansible.module_utils.openshift import OpenShiftCLI
+
+
+class RolloutError(Exception):
+    '''Exception class for rollouts'''
+    pass
+
+
+class RolloutScheduler(OpenShiftCLI):
+    ''' Resumes paused deployment configs as soon as the ones they depend on are ready
+
+        graph maps each deployment config to the deployment configs it depends on, ie:
+
+          backend-redis: []
+          backend-listener: [backend-redis]
+
+        The deployment configs that become resumable together are unpaused with a
+        single `oc patch`; readiness of every deployment config of the namespace is
+        followed with a single `oc get dc -w`.  state=resumed only unpauses names
+        and returns the revisions they had before.
+
+        A resumed deployment config is only judged once the controller has
+        observed the unpause (status.observedGeneration); one that was never
+        deployed must also have rolled out a first revision.
+    '''
+    watch_template = ('{.metadata.name}{" "}{.status.readyReplicas}{" "}{.spec.replicas}{" "}'
+                      '{.status.latestVersion}{" "}{.metadata.generation}{" "}{.status.observedGeneration}{"\\n"}')
+
+    def __init__(self,
+                 namespace,
+                 graph,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for RolloutScheduler '''
+        super(RolloutScheduler, self).__init__(namespace, oc_binary=oc_binary, verbose=verbose)
+        self.graph = dict((name, list(deps or [])) for name, deps in graph.items())
+        self.status = {}
+        self.resumed = {}
+        self.ready = {}
+        self.revisions = {}
+        self.previous = {}
+        self.generations = {}
+        self.patched = []
+        self.start = None
+
+    def waves(self):
+        ''' deployment configs grouped by depth in the graph; fails on unknown dependencies and cycles '''
+        for name, deps in self.graph.items():
+            unknown = [dep for dep in deps if dep not in self.graph]
+            if unknown:
+                raise RolloutError('{} depends on unknown deployment config(s): {}'.format(name, ', '.join(unknown)))
+
+        waves = []
+        placed = set()
+        while len(placed) < len(self.graph):
+            wave = sorted([name for name, deps in self.graph.items()
+                           if name not in placed and set(deps) <= placed])
+            if not wave:
+                raise RolloutError('dependency cycle between: {}'.format(
+                    ', '.join(sorted(set(self.graph) - placed))))
+            waves.append(wave)
+            placed.update(wave)
+
+        return waves
+
+    def resume(self, names):
+        ''' unpause deployment configs with one patch; returns {name: latestVersion before the unpause} '''
+        rval = self.openshift_cmd(['get', 'dc'] + list(names) + ['-o', 'json'], output=True)
+        if rval['returncode'] != 0:
+            raise RolloutError('could not get {}: {}'.format(', '.join(names), rval.get('stderr', '')))
+        dcs = dict((dc['metadata']['name'], dc) for dc in rval['results'].get('items', [rval['results']]))
+
+        rval = self.openshift_cmd(['patch', 'dc'] + list(names) + ['--type', 'merge', '-p', '{"spec":{"paused":false}}'],
+                                  output=True, output_type='raw')
+        if rval['returncode'] != 0:
+            raise RolloutError('could not resume {}: {}'.format(', '.join(names), rval.get('stderr', '')))
+
+        now = time.time()
+        patched = [line.split()[0].split('/')[-1] for line in rval['results'].splitlines()
+                   if line.strip() and '(no change)' not in line]
+        self.patched.extend(patched)
+        for name in names:
+            self.resumed[name] = now
+            dc = dcs.get(name, {})
+            self.previous[name] = dc.get('status', {}).get('latestVersion', 0)
+            # the unpause is a spec change, ie: one more generation for the controller to observe
+            self.generations[name] = dc.get('metadata', {}).get('generation', 0) + (1 if name in patched else 0)
+
+        return dict((name, self.previous[name]) for name in names)
+
+    def watch(self, deadline):
+        ''' yield (name, ready replicas, replicas, latest version, generation, observed generation)
+            from oc get dc -w until the deadline
+        '''
+        cmds = [self.oc_binary, 'get', 'dc', '-w', '-o', 'jsonpath=' + self.watch_template, '-n', self.namespace]
+
+        while time.time() < deadline:
+            if self.verbose:
+                print(' '.join(cmds))
+            # stderr is not read while the watch runs; a pipe would fill up with warnings and block oc
+            errors = tempfile.TemporaryFile()
+            proc = subprocess.Popen(cmds, stdout=subprocess.PIPE, stderr=errors)
+            events = 0
+            buf = b''
+            try:
+                while True:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return
+                    readable, _, _ = select.select([proc.stdout], [], [], remaining)
+                    if not readable:
+                        return
+                    chunk = os.read(proc.stdout.fileno(), 65536)
+                    # the api server closes watches from time to time; start a new one
+                    if not chunk:
+                        break
+                    lines = (buf + chunk).split(b'\n')
+                    buf = lines.pop()
+                    for line in lines:
+                        fields = line.decode('utf-8').split(' ')
+                        if len(fields) != 6 or not fields[0]:
+                            continue
+                        events += 1
+                        yield tuple([fields[0]] + [int(field or 0) for field in fields[1:]])
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+                errors.seek(0)
+                stderr = errors.read().decode('utf-8')
+                errors.close()
+
+            if proc.returncode != 0 and not events:
+                raise RolloutError('{} failed: {}'.format(' '.join(cmds), stderr))
+
+    def is_ready(self, name):
+        ''' resumed, unpause observed, rolled out if never deployed, with one ready replica (or scaled to zero) '''
+        if name not in self.resumed or name not in self.status:
+            return False
+        ready, replicas, version, observed = self.status[name]
+        if observed < self.generations.get(name, 0):
+            return False
+        if version < max(self.previous.get(name, 0), 1):
+            return False
+        return ready > 0 or replicas == 0
+
+    def schedule(self):
+        ''' resume every deployment config whose dependencies are ready; returns the ones resumed '''
+        now = time.time()
+        for name in self.graph:
+            if name not in self.ready and self.is_ready(name):
+                self.ready[name] = now
+                self.revisions[name] = self.status[name][2]
+
+        started = [name for name, deps in sorted(self.graph.items())
+                   if name not in self.resumed and all([dep in self.ready for dep in deps])]
+        if started:
+            self.resume(started)
+
+        return started
+
+    def run(self, timeout):
+        ''' resume and wait for the whole graph '''
+        self.waves()
+        self.start = time.time()
+        self.schedule()
+
+        for name, ready, replicas, version, _, observed in self.watch(self.start + timeout):
+            if name not in self.graph:
+                continue
+            self.status[name] = (ready, replicas, version, observed)
+            # a deployment config that was already ready is ready as soon as it is resumed
+            while self.schedule():
+                pass
+            if len(self.ready) == len(self.graph):
+                return
+
+        raise RolloutError('timed out after {}s waiting for: {}'.format(
+            timeout, ', '.join(sorted(set(self.graph) - set(self.ready)))))
+
+    def timings(self):
+        ''' seconds since the start at which each deployment config was resumed and became ready '''
+        rval = {}
+        for name in self.graph:
+            rval[name] = {'resumed_s': round(self.resumed[name] - self.start, 1) if name in self.resumed else None,
+                          'ready_s': round(self.ready[name] - self.start, 1) if name in self.ready else None,
+                          'revision': self.revisions.get(name)}
+        return rval
+
+    def critical_path(self):
+        ''' chain of deployment configs that determined when the last one became ready '''
+        if not self.ready:
+            return []
+
+        path = [max(self.ready, key=self.ready.get)]
+        while True:
+            deps = [dep for dep in self.graph[path[-1]] if dep in self.ready]
+            if not deps:
+                break
+            path.append(max(deps, key=self.ready.get))
+
+        return list(reversed(path))
+
+    @staticmethod
+    def timestamp(event, field):
+        ''' epoch seconds of an event field; events only carry second precision '''
+        value = event.get(field) or event.get('eventTime') or event.get('lastTimestamp')
+        if not value:
+            return None
+        return calendar.timegm(time.strptime(value.split('.')[0].rstrip('Z'), '%Y-%m-%dT%H:%M:%S'))
+
+    def phases(self, name, events):
+        ''' image pull and readiness phases of the pods of the current revision of a deployment config '''
+        version = self.status[name][2] if name in self.status else self.revisions.get(name, 0)
+        pod = re.compile(r'^{}-{}-(?!deploy$)[a-z0-9]+$'.format(re.escape(name), version))
+        pulling = pulled = started = None
+        probe_failures = 0
+
+        for event in events:
+            obj = event.get('involvedObject', {})
+            if obj.get('kind') != 'Pod' or not pod.match(obj.get('name', '')):
+                continue
+            reason = event.get('reason')
+            if reason == 'Pulling':
+                first = RolloutScheduler.timestamp(event, 'firstTimestamp')
+                pulling = first if pulling is None else min(pulling, first)
+            elif reason == 'Pulled':
+                last = RolloutScheduler.timestamp(event, 'lastTimestamp')
+                pulled = last if pulled is None else max(pulled, last)
+            elif reason == 'Started':
+                first = RolloutScheduler.timestamp(event, 'firstTimestamp')
+                started = first if started is None else min(started, first)
+            elif reason == 'Unhealthy' and 'Readiness' in event.get('message', ''):
+                probe_failures += event.get('count') or 1
+
+        # event timestamps are truncated to the second; never report a negative phase
+        def span(begin, end):
+            return round(max(0, end - begin), 1) if begin is not None and end is not None else None
+
+        return {'revision': version,
+                'resume_to_ready_s': span(self.resumed.get(name), self.ready.get(name)),
+                'image_pull_s': span(pulling, pulled),
+                'resume_to_started_s': span(self.resumed.get(name), started),
+                'readiness_s': span(started, self.ready.get(name)),
+                'readiness_probe_failures': probe_failures}
+
+    def report(self, path):
+        ''' write the timings of this rollout to path, merged with the deployments already reported there '''
+        rval = self.openshift_cmd(['get', 'events', '-o', 'json'], output=True)
+        events = rval['results'].get('items', []) if rval['returncode'] == 0 else []
+
+        report = {'deployments': {}}
+        if os.path.isfile(path):
+            with open(path) as rfd:
+                report = json.load(rfd)
+
+        timings = self.timings()
+        for name in self.graph:
+            report['deployments'][name] = dict(timings[name], **self.phases(name, events))
+        report.update({'namespace': self.namespace,
+                       'started': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.start)),
+                       'elapsed_s': round(time.time() - self.start, 1),
+                       'critical_path': self.critical_path()})
+
+        with open(path + '.tmp', 'w') as rfd:
+            json.dump(report, rfd, indent=2, sort_keys=True)
+        os.rename(path + '.tmp', path)
+
+        return report
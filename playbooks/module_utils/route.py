@@ -0,0 +1,313 @@
+#!/usr/bin/python
+
+import time
+
+from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.router_shard import RouterShards
+
+
+class RouteError(Exception):
+    '''Exception class for routes'''
+    pass
+
+
+class RouteConfig(object):
+    ''' Handle route options '''
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 sname,
+                 namespace,
+                 oc_binary,
+                 labels=None,
+                 destcacert=None,
+                 cacert=None,
+                 cert=None,
+                 key=None,
+                 host=None,
+                 tls_termination=None,
+                 service_name=None,
+                 wildcard_policy=None,
+                 weight=None,
+                 port=None):
+        ''' constructor for handling route options '''
+        self.oc_binary = oc_binary
+        self.name = sname
+        self.namespace = namespace
+        self.labels = labels
+        self.host = host
+        self.tls_termination = tls_termination
+        self.destcacert = destcacert
+        self.cacert = cacert
+        self.cert = cert
+        self.key = key
+        self.service_name = service_name
+        self.port = port
+        self.data = {}
+        self.wildcard_policy = wildcard_policy
+        if wildcard_policy is None:
+            self.wildcard_policy = 'None'
+        self.weight = weight
+        if weight is None:
+            self.weight = 100
+
+        self.create_dict()
+
+    def create_dict(self):
+        ''' return a service as a dict '''
+        self.data['apiVersion'] = 'v1'
+        self.data['kind'] = 'Route'
+        self.data['metadata'] = {}
+        self.data['metadata']['name'] = self.name
+        self.data['metadata']['namespace'] = self.namespace
+        if self.labels:
+            self.data['metadata']['labels'] = self.labels
+        self.data['spec'] = {}
+
+        self.data['spec']['host'] = self.host
+
+        if self.tls_termination:
+            self.data['spec']['tls'] = {}
+
+            self.data['spec']['tls']['termination'] = self.tls_termination
+
+            if self.tls_termination != 'passthrough':
+                self.data['spec']['tls']['key'] = self.key
+                self.data['spec']['tls']['caCertificate'] = self.cacert
+                self.data['spec']['tls']['certificate'] = self.cert
+
+            if self.tls_termination == 'reencrypt':
+                self.data['spec']['tls']['destinationCACertificate'] = self.destcacert
+
+        self.data['spec']['to'] = {'kind': 'Service',
+                                   'name': self.service_name,
+                                   'weight': self.weight}
+
+        self.data['spec']['wildcardPolicy'] = self.wildcard_policy
+
+        if self.port:
+            self.data['spec']['port'] = {}
+            self.data['spec']['port']['targetPort'] = self.port
+
+class RouteBatch(OpenShiftCLI):
+    ''' Creates or updates several routes of a namespace with one get and one oc apply
+
+        Routes that already match their definition are left alone.  A route is
+        in conflict when another route of the batch or of the namespace claims
+        its host, when oc apply rejects it, or when the router does not admit it.
+        Routers admit a route asynchronously: the applied routes are read again
+        until a router has set their Admitted condition.
+    '''
+    interval = 1
+
+    def __init__(self,
+                 namespace,
+                 configs,
+                 oc_binary='oc',
+                 verbose=False):
+        ''' Constructor for RouteBatch; configs are RouteConfig '''
+        super(RouteBatch, self).__init__(namespace, oc_binary=oc_binary, verbose=verbose)
+        self.configs = configs
+
+    @staticmethod
+    def from_routes(routes, namespace, oc_binary='oc', shards=None, shard_domain=None):
+        ''' (RouteConfig per route, {name: shard}) of oc_route style route dicts
+
+            With shards, the routes of a tenant (its namespace unless shard_key
+            is given) share a router shard: they get its label and, with
+            shard_domain, their hosts move under the domain of the shard.
+        '''
+        configs = []
+        route_shards = {}
+        for route in routes:
+            if not route.get('name'):
+                raise RouteError('every route needs a name: {}'.format(route))
+
+            labels = route.get('labels')
+            host = route.get('host')
+            if shards:
+                key = route.get('shard_key') or namespace
+                route_shards[route['name']] = shards.shard(key)
+                labels = dict(labels or {}, **shards.labels(key))
+                if host and shard_domain:
+                    host = RouterShards.host(host, shard_domain, route_shards[route['name']])
+
+            configs.append(RouteConfig(route['name'],
+                                       namespace,
+                                       oc_binary,
+                                       labels=labels,
+                                       host=host,
+                                       tls_termination=route.get('tls_termination'),
+                                       service_name=route.get('service_name') or route['name'],
+                                       wildcard_policy=route.get('wildcard_policy'),
+                                       weight=route.get('weight'),
+                                       port=route.get('port')))
+        return configs, route_shards
+
+    @staticmethod
+    def prune(data):
+        ''' drop the unset (None) values of a route definition '''
+        if isinstance(data, dict):
+            return dict((key, RouteBatch.prune(value)) for key, value in data.items() if value is not None)
+        return data
+
+    @staticmethod
+    def definition(config):
+        ''' route of a RouteConfig, as submitted to oc apply '''
+        data = RouteBatch.prune(config.data)
+        data['apiVersion'] = 'route.openshift.io/v1'
+        data['metadata'].pop('namespace', None)
+        return data
+
+    @staticmethod
+    def matches(desired, current):
+        ''' is every value of the definition already set on the route '''
+        if isinstance(desired, dict):
+            return isinstance(current, dict) and all([RouteBatch.matches(value, current.get(key))
+                                                      for key, value in desired.items()])
+        return str(desired) == str(current)
+
+    def current(self):
+        ''' {name: route} of the namespace, with one get '''
+        rval = self._get('route')
+        if rval['returncode'] != 0:
+            if 'namespaces "%s" not found' % self.namespace in rval.get('stderr', ''):
+                return {}
+            raise RouteError('could not get the routes of {}: {}'.format(self.namespace, rval.get('stderr', '')))
+
+        routes = {}
+        for result in rval['results']:
+            for route in result.get('items', [result] if result.get('kind') == 'Route' else []):
+                routes[route['metadata']['name']] = route
+        return routes
+
+    def plan(self, current):
+        ''' (create | update | unchanged per route, conflicts per route) '''
+        actions = {}
+        conflicts = {}
+
+        claimed = {}
+        for name, route in current.items():
+            if route.get('spec', {}).get('host'):
+                claimed.setdefault(route['spec']['host'], []).append(name)
+        for config in self.configs:
+            if config.host:
+                claimed.setdefault(config.host, []).append(config.name)
+
+        for config in self.configs:
+            others = sorted(set(claimed.get(config.host, [])) - set([config.name]))
+            if others:
+                conflicts[config.name] = 'host {} is also claimed by route {}'.format(config.host, ', '.join(others))
+                continue
+
+            desired = RouteBatch.definition(config)
+            desired = dict((key, desired[key]) for key in ('spec', 'metadata') if key in desired)
+            desired['metadata'].pop('name', None)
+            if config.name not in current:
+                actions[config.name] = 'create'
+            elif RouteBatch.matches(desired, current[config.name]):
+                actions[config.name] = 'unchanged'
+            else:
+                actions[config.name] = 'update'
+
+        return actions, conflicts
+
+    def apply(self, names):
+        ''' submit the named routes as one List to oc apply '''
+        items = [RouteBatch.definition(config) for config in self.configs if config.name in names]
+        fname = Utils.create_tmp_file_from_contents('oc_route-',
+                                                    {'apiVersion': 'v1', 'kind': 'List', 'items': items},
+                                                    ftype='json')
+        return self.openshift_cmd(['apply', '-f', fname], output=True, output_type='raw')
+
+    @staticmethod
+    def rejected(names, api_rval):
+        ''' {name: error} of the routes oc apply did not accept '''
+        applied = set()
+        for line in api_rval['results'].splitlines():
+            fields = line.split()
+            if fields:
+                applied.add(fields[0].split('/')[-1])
+
+        errors = {}
+        stderr = api_rval.get('stderr', '').splitlines()
+        for name in names:
+            if name in applied:
+                continue
+            lines = [line.strip() for line in stderr if '"{}"'.format(name) in line]
+            errors[name] = ' '.join(lines) or 'not applied: {}'.format(api_rval.get('stderr', '').strip())
+        return errors
+
+    @staticmethod
+    def ingresses(route):
+        ''' status.ingress entries of the routers for the current host of the route
+
+            An updated route keeps the entries of its previous host until the
+            routers process it again, those say nothing about the new host.
+        '''
+        host = (route or {}).get('spec', {}).get('host')
+        return [ingress for ingress in (route or {}).get('status', {}).get('ingress') or []
+                if ingress.get('host') == host]
+
+    @staticmethod
+    def not_admitted(routes):
+        ''' {name: reason} of the routes a router refused, ie: HostAlreadyClaimed '''
+        refused = {}
+        for name, route in routes.items():
+            for ingress in RouteBatch.ingresses(route):
+                for condition in ingress.get('conditions') or []:
+                    if condition.get('type') == 'Admitted' and condition.get('status') == 'False':
+                        refused[name] = '{} router: {} {}'.format(ingress.get('routerName', ''),
+                                                                condition.get('reason', ''),
+                                                                condition.get('message', '')).strip()
+        return refused
+
+    @staticmethod
+    def decided(route):
+        ''' has a router admitted or refused the current host of the route '''
+        return any([condition.get('type') == 'Admitted'
+                    for ingress in RouteBatch.ingresses(route)
+                    for condition in ingress.get('conditions') or []])
+
+    def admission(self, names, timeout):
+        ''' ({name: route} of the batch, names still undecided) once a router decided on every named route
+
+            The routes are read every interval seconds for at most timeout seconds.
+        '''
+        deadline = time.time() + timeout
+        batch = set([config.name for config in self.configs])
+        while True:
+            routes = dict((name, route) for name, route in self.current().items() if name in batch)
+            undecided = sorted([name for name in names if not RouteBatch.decided(routes.get(name))])
+            if not undecided or time.time() >= deadline:
+                return routes, undecided
+            time.sleep(self.interval)
+
+    def ensure(self, update=True, check_mode=False, admission_timeout=30):
+        ''' (action per route, conflicts per route, applied names) once the routes that differ are applied
+
+            Without update an existing route that differs is left alone
+            (action differs), like a single oc_route.  check_mode only plans.
+            An applied route no router decided on within admission_timeout
+            seconds is in conflict; 0 only reports the refusals already set.
+        '''
+        actions, conflicts = self.plan(self.current())
+        for name, action in actions.items():
+            if action == 'update' and not update:
+                actions[name] = 'differs'
+        pending = sorted([name for name, action in actions.items() if action in ('create', 'update')])
+        if check_mode or not pending:
+            return actions, conflicts, pending
+
+        api_rval = self.apply(pending)
+        for name, error in RouteBatch.rejected(pending, api_rval).items():
+            conflicts[name] = error
+            actions.pop(name, None)
+
+        routes, undecided = self.admission([name for name in pending if name in actions], admission_timeout)
+        conflicts.update(RouteBatch.not_admitted(dict((name, route) for name, route in routes.items()
+                                                      if name in actions)))
+        if admission_timeout > 0:
+            for name in undecided:
+                conflicts[name] = 'not admitted by any router within {}s'.format(admission_timeout)
+        return actions, conflicts, pending
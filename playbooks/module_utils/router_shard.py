@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+import hashlib
+
+
+class RouterShardError(Exception):
+    '''Exception class for router shards'''
+    pass
+
+
+class RouterShards(object):
+    ''' Assigns the routes of a tenant to one of several router shards
+
+        A shard is an IngressController admitting the routes labelled
+        <label>=<shard>, serving the hosts of <shard>.<domain>.
+
+        strategy hash:    rendezvous hashing of the tenant over the shards; adding
+                          or removing a shard only moves the tenants of that shard
+        strategy tenant:  the shard given for the tenant in assignments, hash for
+                          the tenants that have none
+    '''
+    strategies = ('hash', 'tenant')
+    operator_namespace = 'openshift-ingress-operator'
+
+    def __init__(self, shards, label='router-shard', strategy='hash', assignments=None):
+        ''' Constructor for RouterShards '''
+        self.shards = list(shards or [])
+        self.label = label
+        self.strategy = strategy
+        self.assignments = assignments or {}
+
+    def validate(self):
+        ''' raise RouterShardError on an unusable configuration '''
+        if not self.shards:
+            raise RouterShardError('at least one router shard is required')
+        if len(set(self.shards)) != len(self.shards):
+            raise RouterShardError('router shards are not unique: {}'.format(', '.join(self.shards)))
+        if self.strategy not in self.strategies:
+            raise RouterShardError('unknown router shard strategy {}, expected one of {}'.format(
+                self.strategy, ', '.join(self.strategies)))
+        unknown = sorted(set(self.assignments.values()) - set(self.shards))
+        if unknown:
+            raise RouterShardError('tenants assigned to unknown router shards: {}'.format(', '.join(unknown)))
+
+    @staticmethod
+    def score(shard, key):
+        ''' rendezvous weight of a tenant on a shard '''
+        return int(hashlib.md5('{}/{}'.format(shard, key).encode('utf-8')).hexdigest(), 16)
+
+    def shard(self, key):
+        ''' shard of a tenant '''
+        if self.strategy == 'tenant' and key in self.assignments:
+            return self.assignments[key]
+        return max(self.shards, key=lambda shard: RouterShards.score(shard, key))
+
+    def labels(self, key):
+        ''' labels of the routes of a tenant '''
+        return {self.label: self.shard(key)}
+
+    @staticmethod
+    def host(host, domain, shard):
+        ''' move a host of the cluster domain under the domain of the shard '''
+        suffix = '.{}'.format(domain)
+        if not host.endswith(suffix) or host.endswith('.{}{}'.format(shard, suffix)):
+            return host
+        return '{}.{}.{}'.format(host[:-len(suffix)], shard, domain)
+
+    @staticmethod
+    def unshard(host, domain, shard):
+        ''' host of the cluster domain a sharded host was derived from '''
+        suffix = '.{}.{}'.format(shard, domain)
+        if shard and host.endswith(suffix):
+            return '{}.{}'.format(host[:-len(suffix)], domain)
+        return host
+
+    def ingress_controllers(self, domain, replicas=2, exclude_default=False):
+        ''' IngressController of each shard and, with exclude_default, the default one without sharded routes '''
+        objects = [{'apiVersion': 'operator.openshift.io/v1',
+                    'kind': 'IngressController',
+                    'metadata': {'name': shard, 'namespace': self.operator_namespace},
+                    'spec': {'domain': '{}.{}'.format(shard, domain),
+                             'replicas': replicas,
+                             'routeSelector': {'matchLabels': {self.label: shard}}}}
+                   for shard in self.shards]
+
+        if exclude_default:
+            objects.append({'apiVersion': 'operator.openshift.io/v1',
+                            'kind': 'IngressController',
+                            'metadata': {'name': 'default', 'namespace': self.operator_namespace},
+                            'spec': {'routeSelector': {'matchExpressions': [
+                                {'key': self.label, 'operator': 'DoesNotExist'}]}}})
+        return objects
+
+    def distribution(self, current):
+        ''' {shard: [tenants]} of {tenant: shard} '''
+        shards = dict((shard, []) for shard in self.shards)
+        for key, shard in sorted(current.items()):
+            shards.setdefault(shard, []).append(key)
+        return shards
+
+    def moves(self, current):
+        ''' {tenant: {from, to}} of the tenants whose shard changed '''
+        moves = {}
+        for key, shard in sorted(current.items()):
+            target = self.shard(key)
+            if target != shard:
+                moves[key] = {'from': shard, 'to': target}
+        return moves
@@ -0,0 +1,150 @@
+#!/usr/bin/python
+
+import fnmatch
+
+
+class TemplatePatch(object):
+    ''' Class to apply declarative edits to the objects of an OpenShift template
+
+        The template is parsed once, every edit is applied in memory and the
+        result is written once.  An edit selects objects by kind and name
+        (shell-style pattern) and may set:
+
+          paused:        spec.paused of a DeploymentConfig
+          replicas:      spec.replicas
+          resources:     {limits: {...}, requests: {...}} merged into each container
+          resource_map:  {cpu: {'500m': '250m'}, memory: {'32Gi': '2Gi'}}
+                         replaces matching resource values of each container
+          access_modes:  spec.accessModes of a PersistentVolumeClaim
+          anti_affinity: preferred | required; spread the pods of a DeploymentConfig
+                         over topology_key (default kubernetes.io/hostname)
+          env:           {NAME: value} set on each container
+          container:     restrict resources / resource_map / env to one container
+    '''
+
+    def __init__(self, content):
+        self.content = content
+
+    @property
+    def objects(self):
+        ''' objects of the template; a plain List or single object works as well '''
+        if 'objects' in self.content:
+            return self.content['objects']
+        if 'items' in self.content:
+            return self.content['items']
+        return [self.content]
+
+    @staticmethod
+    def matches(obj, edit):
+        ''' does the edit select this object '''
+        kind = edit.get('kind') or 'DeploymentConfig'
+        if obj.get('kind', '').lower() != kind.lower():
+            return False
+
+        return fnmatch.fnmatchcase(obj.get('metadata', {}).get('name', ''), edit.get('name') or '*')
+
+    @staticmethod
+    def containers(obj, edit):
+        ''' containers of the pod template selected by the edit '''
+        spec = obj.get('spec', {}).get('template', {}).get('spec', {})
+        return [container for container in spec.get('containers', []) + spec.get('initContainers', [])
+                if not edit.get('container') or container.get('name') == edit['container']]
+
+    @staticmethod
+    def set_value(data, key, value):
+        ''' set data[key]; return whether it changed '''
+        if key in data and data[key] == value:
+            return False
+        data[key] = value
+        return True
+
+    @staticmethod
+    def set_env(container, name, value):
+        ''' set an environment variable of a container; return whether it changed '''
+        env = container.setdefault('env', [])
+        for var in env:
+            if var.get('name') != name:
+                continue
+            if var.get('value') == value and 'valueFrom' not in var:
+                return False
+            var.pop('valueFrom', None)
+            var['value'] = value
+            return True
+        env.append({'name': name, 'value': value})
+        return True
+
+    @staticmethod
+    def anti_affinity(obj, edit):
+        ''' pod anti affinity between the pods selected by the DeploymentConfig '''
+        term = {'labelSelector': {'matchLabels': dict(obj.get('spec', {}).get('selector') or {})},
+                'topologyKey': edit.get('topology_key') or 'kubernetes.io/hostname'}
+        if edit['anti_affinity'] == 'required':
+            return {'podAntiAffinity': {'requiredDuringSchedulingIgnoredDuringExecution': [term]}}
+        return {'podAntiAffinity': {'preferredDuringSchedulingIgnoredDuringExecution': [
+            {'weight': 100, 'podAffinityTerm': term}]}}
+
+    @staticmethod
+    def apply_edit(obj, edit):
+        ''' apply one edit to one object; returns the names of the fields that changed '''
+        changes = []
+        spec = obj.setdefault('spec', {})
+
+        if edit.get('paused') is not None and TemplatePatch.set_value(spec, 'paused', edit['paused']):
+            changes.append('paused')
+
+        if edit.get('replicas') is not None and TemplatePatch.set_value(spec, 'replicas', edit['replicas']):
+            changes.append('replicas')
+
+        if edit.get('access_modes') and TemplatePatch.set_value(spec, 'accessModes', list(edit['access_modes'])):
+            changes.append('accessModes')
+
+        if edit.get('anti_affinity'):
+            pod_spec = spec.setdefault('template', {}).setdefault('spec', {})
+            if TemplatePatch.set_value(pod_spec, 'affinity', TemplatePatch.anti_affinity(obj, edit)):
+                changes.append('affinity')
+
+        if not edit.get('resources') and not edit.get('resource_map') and not edit.get('env'):
+            return changes
+
+        for container in TemplatePatch.containers(obj, edit):
+            resources = container.setdefault('resources', {})
+
+            for section, values in (edit.get('resources') or {}).items():
+                current = resources.setdefault(section, {})
+                for resource, value in values.items():
+                    if TemplatePatch.set_value(current, resource, value):
+                        changes.append('{}.resources.{}.{}'.format(container['name'], section, resource))
+
+            for resource, mapping in (edit.get('resource_map') or {}).items():
+                mapping = dict((str(old), str(new)) for old, new in mapping.items())
+                for section in ('limits', 'requests'):
+                    current = resources.get(section) or {}
+                    if resource in current and str(current[resource]) in mapping:
+                        current[resource] = mapping[str(current[resource])]
+                        changes.append('{}.resources.{}.{}'.format(container['name'], section, resource))
+
+            for name, value in sorted((edit.get('env') or {}).items()):
+                if TemplatePatch.set_env(container, name, str(value)):
+                    changes.append('{}.env.{}'.format(container['name'], name))
+
+        return changes
+
+    def apply(self, edits):
+        ''' apply every edit; returns {kind/name: [changed fields]} '''
+        changed = {}
+        for obj in self.objects:
+            for edit in edits:
+                if not TemplatePatch.matches(obj, edit):
+                    continue
+                changes = TemplatePatch.apply_edit(obj, edit)
+                if changes:
+                    key = '{}/{}'.format(obj['kind'], obj['metadata']['name'])
+                    changed.setdefault(key, []).extend(changes)
+
+        return changed
+
+    @staticmethod
+    def unmatched(objects, edits):
+        ''' edits that did not select any object '''
+        return [edit for edit in edits
+                if not any([TemplatePatch.matches(obj, edit) for obj in objects])]
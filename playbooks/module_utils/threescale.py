@@ -0,0 +1,392 @@
+#!/usr/bin/python
+
+import fcntl
+import os
+import re
+import ssl
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+try:
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
+    from urllib.parse import urlencode, urlparse
+except ImportError:
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
+    from urllib import urlencode
+    from urlparse import urlparse
+
+
+class ThreeScaleAPIError(Exception):
+    '''Exception class for the 3scale master API'''
+    pass
+
+
+class ConnectionPool(object):
+    ''' Thread safe pool of keep-alive connections to a single host '''
+
+    def __init__(self, url, maxsize=10, timeout=20, context=None):
+        parsed = urlparse(url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.context = context
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new(self):
+        ''' open a new connection '''
+        if self.scheme == 'https':
+            return HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.context)
+        return HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def get(self):
+        ''' return an idle connection and whether it was reused '''
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new(), False
+
+    def put(self, conn):
+        ''' hand a connection back for reuse '''
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        ''' close every idle connection '''
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+
+
+class MasterAPI(object):
+    ''' Class to wrap the 3scale master REST API
+
+        One instance is meant to be shared by every tenant of a run:
+        requests go over pooled keep-alive connections and the latency
+        of each endpoint is recorded in metrics().
+    '''
+
+    providers_path = '/admin/api/accounts.xml'
+    create_provider_path = '/master/api/providers.xml'
+    delete_provider_path = '/master/api/providers/{}.xml'
+    activate_user_path = '/admin/api/accounts/{}/users/{}/activate.xml'
+    providers_per_page = 500
+    re_id = re.compile(r'/\d+(?=[/.])')
+
+    def __init__(self,
+                 master_url,
+                 access_token,
+                 validate_certs=False,
+                 timeout=20,
+                 pool_size=10):
+        ''' Constructor for MasterAPI '''
+        self.master_url = master_url.rstrip('/')
+        self.access_token = access_token
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        context = None
+        if urlparse(self.master_url).scheme == 'https':
+            context = ssl.create_default_context()
+            if not validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+        self.pool = ConnectionPool(self.master_url, maxsize=pool_size, timeout=timeout, context=context)
+        self._samples = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def _record(self, endpoint, elapsed, failed):
+        ''' record the latency of one call '''
+        with self._lock:
+            self._samples.setdefault(endpoint, []).append(elapsed)
+            if failed:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def _send(self, method, path, body, headers):
+        ''' send a request over a pooled connection and read the whole response '''
+        conn, reused = self.pool.get()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            content = resp.read()
+        except (HTTPException, OSError):
+            conn.close()
+            # a reused connection may have been closed by the server while idle;
+            # retry once on a fresh one unless the call is not idempotent
+            if reused and method != 'POST':
+                return self._send(method, path, body, headers)
+            raise
+
+        if resp.getheader('connection', '').lower() == 'close':
+            conn.close()
+        else:
+            self.pool.put(conn)
+
+        return resp.status, content
+
+    def _request(self, method, path, params=None, status_codes=(200,)):
+        '''issue a request against the master API and return status and content'''
+        params = dict(params or {})
+        params['access_token'] = self.access_token
+        endpoint = '{} {}'.format(method, self.re_id.sub('/{id}', path))
+        headers = {'Connection': 'keep-alive'}
+        body = None
+
+        if method == 'GET':
+            path = '{}?{}'.format(path, urlencode(params))
+        else:
+            body = urlencode(params)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        start = time.time()
+        try:
+            status, content = self._send(method, path, body, headers)
+        except (HTTPException, OSError) as err:
+            self._record(endpoint, time.time() - start, True)
+            raise ThreeScaleAPIError('{} failed: {}'.format(endpoint, err))
+
+        self._record(endpoint, time.time() - start, status not in status_codes)
+
+        content = content.decode('utf-8')
+        if status not in status_codes:
+            raise ThreeScaleAPIError('{} returned {}: {}'.format(endpoint, status, content))
+
+        return {'status': status, 'content': content}
+
+    def metrics(self):
+        ''' return call count, errors and latency percentiles (ms) per endpoint '''
+        rval = {}
+        with self._lock:
+            for endpoint, samples in self._samples.items():
+                ordered = sorted(samples)
+                rval[endpoint] = {
+                    'calls': len(ordered),
+                    'errors': self._errors.get(endpoint, 0),
+                    'total_ms': round(sum(ordered) * 1000, 1),
+                    'p50_ms': round(percentile(ordered, 50) * 1000, 1),
+                    'p95_ms': round(percentile(ordered, 95) * 1000, 1),
+                    'p99_ms': round(percentile(ordered, 99) * 1000, 1),
+                    'max_ms': round(ordered[-1] * 1000, 1),
+                }
+        return rval
+
+    def close(self):
+        ''' release the pooled connections '''
+        self.pool.close()
+
+    def providers(self):
+        '''return the provider index as a dict of org_name => [account ids]'''
+        index = {}
+        page = 1
+        while True:
+            rval = self._request('GET', self.providers_path,
+                                 {'page': page, 'per_page': self.providers_per_page})
+            accounts = ET.fromstring(rval['content']).findall('account')
+            for account in accounts:
+                index.setdefault(account.findtext('org_name'), []).append(account.findtext('id'))
+
+            if len(accounts) < self.providers_per_page:
+                break
+            page += 1
+
+        return index
+
+    def create_provider(self, org_name, username, password, email):
+        '''sign up a tenant; returns the raw signup response
+
+           NOTE: As of 3scale 2.2, this operation is not idempotent.
+        '''
+        return self._request('POST', self.create_provider_path,
+                             {'org_name': org_name,
+                              'username': username,
+                              'password': password,
+                              'email': email},
+                             status_codes=(201,))
+
+    def activate_user(self, account_id, user_id):
+        '''activate the pending admin user of a tenant'''
+        return self._request('PUT', self.activate_user_path.format(account_id, user_id))
+
+    def delete_provider(self, account_id):
+        '''delete a tenant (provider account) and everything it owns; False when it was already gone'''
+        rval = self._request('DELETE', self.delete_provider_path.format(account_id), status_codes=(200, 404))
+        return rval['status'] != 404
+
+
+def percentile(ordered, pct):
+    ''' nearest-rank percentile of an ascending list '''
+    if not ordered:
+        return 0
+    rank = int(round(pct / 100.0 * len(ordered) + 0.5)) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+class TenantStore(object):
+    ''' Class to read the signup responses saved for each tenant '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def signup_file(self, org_name):
+        ''' return the path of the saved signup response of a tenant '''
+        return os.path.join(self.path, '{}-tenant-signup.xml'.format(org_name))
+
+    def account_id(self, org_name):
+        ''' return the account id of a tenant or None when it was never stored '''
+        signup = self.signup(org_name)
+        if signup is None:
+            return None
+
+        return signup['account_id']
+
+    def save(self, org_name, content):
+        ''' store the signup response of a tenant '''
+        sfile = self.signup_file(org_name)
+        with open(sfile + '.tmp', 'w') as sfd:
+            sfd.write(content)
+        os.rename(sfile + '.tmp', sfile)
+
+    def signup(self, org_name):
+        ''' return access token, account id and admin user id of a stored tenant '''
+        sfile = self.signup_file(org_name)
+        if not self.path or not os.path.isfile(sfile):
+            return None
+
+        return TenantStore.parse_signup(ET.parse(sfile).getroot())
+
+    @staticmethod
+    def parse_signup(root):
+        ''' extract access token, account id and admin user id from a signup response '''
+        user_id = root.findtext(".//user[state='pending']/id")
+        if user_id is None:
+            user_id = root.findtext('.//users/user/id')
+
+        return {'access_token': root.findtext('.//access_token/value'),
+                'account_id': root.findtext('.//account/id'),
+                'user_id': user_id}
+
+    def remove(self, org_name):
+        ''' forget a tenant '''
+        sfile = self.signup_file(org_name)
+        if self.path and os.path.isfile(sfile):
+            os.remove(sfile)
+
+
+class TenantJournal(object):
+    ''' Class to wrap the append-only journal of completed tenant provisioning steps
+
+        Each line is: <org_name> TAB <step> TAB <epoch seconds>
+        A "removed" step forgets every step recorded before it for that tenant.
+    '''
+    removed = 'removed'
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, org_name, step):
+        ''' durably append a step; safe against concurrent writers '''
+        line = '{}\t{}\t{}\n'.format(org_name, step, int(time.time()))
+        with open(self.path, 'a+') as jfd:
+            fcntl.flock(jfd, fcntl.LOCK_EX)
+            # terminate a torn line left behind by an interrupted writer
+            if jfd.seek(0, os.SEEK_END) > 0:
+                jfd.seek(jfd.tell() - 1)
+                if jfd.read(1) != '\n':
+                    line = '\n' + line
+            jfd.write(line)
+            jfd.flush()
+            os.fsync(jfd.fileno())
+            fcntl.flock(jfd, fcntl.LOCK_UN)
+
+    def steps(self):
+        ''' return the completed steps as a dict of org_name => [steps] '''
+        rval = {}
+        if not self.path or not os.path.isfile(self.path):
+            return rval
+
+        with open(self.path) as jfd:
+            for line in jfd:
+                fields = line.rstrip('\n').split('\t')
+                # a torn last line from an interrupted run is ignored
+                if len(fields) != 3:
+                    continue
+                org_name, step = fields[0], fields[1]
+                if step == TenantJournal.removed:
+                    rval.pop(org_name, None)
+                elif step not in rval.setdefault(org_name, []):
+                    rval[org_name].append(step)
+
+        return rval
+
+
+class TenantProvisioner(object):
+    ''' Class to sign up and activate tenants, resuming from the journal
+
+        The journal is read once; steps completed by this provisioner are
+        appended to it and tracked in memory.
+    '''
+
+    def __init__(self, api, store, journal=None):
+        self.api = api
+        self.store = store
+        self.journal = journal
+        self._steps = journal.steps() if journal is not None else {}
+        self._lock = threading.Lock()
+
+    def completed(self, org_name):
+        ''' steps already recorded for a tenant '''
+        with self._lock:
+            return list(self._steps.get(org_name, []))
+
+    def checkpoint(self, org_name, step):
+        ''' record a completed step '''
+        if self.journal is not None:
+            self.journal.record(org_name, step)
+        with self._lock:
+            self._steps.setdefault(org_name, []).append(step)
+
+    def create(self, tenant):
+        '''sign up and activate one tenant, skipping the steps already journaled'''
+        rval = dict(tenant)
+        rval.update({'changed': False, 'errors': []})
+        org_name = tenant['org_name']
+        completed = self.completed(org_name)
+
+        try:
+            if 'created' in completed:
+                signup = self.store.signup(org_name)
+                if signup is None:
+                    raise ThreeScaleAPIError('{} is journaled as created but {} is missing'.format(
+                        org_name, self.store.signup_file(org_name)))
+            else:
+                response = self.api.create_provider(org_name,
+                                                    tenant['username'],
+                                                    tenant['password'],
+                                                    tenant['email'])
+                self.store.save(org_name, response['content'])
+                self.checkpoint(org_name, 'created')
+                signup = self.store.signup(org_name)
+                rval['changed'] = True
+
+            rval.update(signup)
+
+            if 'activated' not in completed:
+                self.api.activate_user(signup['account_id'], signup['user_id'])
+                self.checkpoint(org_name, 'activated')
+                rval['changed'] = True
+        except ThreeScaleAPIError as err:
+            rval['errors'].append(str(err))
+        # a malformed signup body or a failed store write fails this tenant only
+        except (ET.ParseError, IOError, OSError) as err:
+            rval['errors'].append('signup response of {}: {}'.format(org_name, err))
+
+        rval['completed_steps'] = self.completed(org_name)
+
+        return rval
@@ -0,0 +1,323 @@
+#!/usr/bin/python
+
+import copy
+import os
+import re
+
+from ansible.module_utils.openshift import OpenShiftCLI
+from ansible.module_utils.openshift import OpenShiftCLIError
+from ansible.module_utils.openshift import Utils
+from ansible.module_utils.openshift_template import TemplateProcessError
+from ansible.module_utils.openshift_template import TemplateProcessor
+from ansible.module_utils.project import ProjectEnsure
+from ansible.module_utils.project_teardown import ProjectTeardown
+from ansible.module_utils.project_teardown import ProjectTeardownError
+from ansible.module_utils.rollout import RolloutError
+from ansible.module_utils.rollout import RolloutScheduler
+from ansible.module_utils.route import RouteBatch
+from ansible.module_utils.route import RouteError
+from ansible.module_utils.six import string_types
+from ansible.module_utils.template_patch import TemplatePatch
+
+
+class GatewayError(Exception):
+    '''Exception class for tenant gateways'''
+    pass
+
+
+class GatewayProfile(object):
+    ''' Configuration loading, caching, workers and resources of the staging and production gateways
+
+        Each gateway of a profile sets:
+
+          environment:     DEPLOYMENT_ENVIRONMENT, sandbox | production
+          loader:          CONFIGURATION_LOADER, boot | lazy
+          cache:           CONFIGURATION_CACHE in seconds; 0 refetches the configuration
+                           on every request (lazy only), -1 never reloads it, None keeps
+                           the default of the template
+          management_api:  MANAGEMENT_API, disabled | status | policies | debug
+          workers:         APICAST_WORKERS, a number or auto (one per cpu), None keeps
+                           the default of the template
+          resources:       {requests: {cpu, memory}, limits: {cpu, memory}}, None keeps
+                           the resources of the template
+
+        Overrides are merged over the profile, per gateway.
+    '''
+    loaders = ('boot', 'lazy')
+    management_apis = ('disabled', 'status', 'policies', 'debug')
+    environments = ('sandbox', 'production')
+    quantities = {'cpu': re.compile(r'^[0-9]+(\.[0-9]+)?m?$'),
+                  'memory': re.compile(r'^[0-9]+(Ki|Mi|Gi|K|M|G)?$')}
+
+    profiles = {
+        # what the gateways always were: stage refetches its configuration on every request,
+        # workers and resources are left to the template
+        'dev': {
+            'stage': {'environment': 'sandbox', 'loader': 'lazy', 'cache': 0, 'management_api': 'debug',
+                      'workers': None, 'resources': None},
+            'prod': {'environment': 'production', 'loader': 'boot', 'cache': None, 'management_api': None,
+                     'workers': None, 'resources': None},
+        },
+        # both gateways under traffic; stage reads system-app at most once a minute per service
+        'load-test': {
+            'stage': {'environment': 'sandbox', 'loader': 'lazy', 'cache': 60, 'management_api': 'status',
+                      'workers': 2,
+                      'resources': {'requests': {'cpu': '500m', 'memory': '128Mi'},
+                                    'limits': {'cpu': '1000m', 'memory': '256Mi'}}},
+            'prod': {'environment': 'production', 'loader': 'boot', 'cache': 300, 'management_api': 'status',
+                     'workers': 2,
+                     'resources': {'requests': {'cpu': '500m', 'memory': '128Mi'},
+                                   'limits': {'cpu': '1000m', 'memory': '256Mi'}}},
+        },
+        'production': {
+            'stage': {'environment': 'sandbox', 'loader': 'lazy', 'cache': 60, 'management_api': 'status',
+                      'workers': 1,
+                      'resources': {'requests': {'cpu': '250m', 'memory': '128Mi'},
+                                    'limits': {'cpu': '1000m', 'memory': '256Mi'}}},
+            'prod': {'environment': 'production', 'loader': 'boot', 'cache': 300, 'management_api': 'disabled',
+                     'workers': 'auto',
+                     'resources': {'requests': {'cpu': '1000m', 'memory': '256Mi'},
+                                   'limits': {'cpu': '2000m', 'memory': '512Mi'}}},
+        },
+    }
+
+    def __init__(self, name, overrides=None, names=None, secret_name='apicast-configuration-url-secret'):
+        ''' Constructor for GatewayProfile; names maps stage and / or prod to the APICAST_NAME of the gateway '''
+        self.name = name
+        self.overrides = overrides or {}
+        self.names = names or {'stage': 'gw-stage', 'prod': 'gw-prod'}
+        self.secret_name = secret_name
+
+    def settings(self):
+        ''' {stage|prod: settings} of the gateways in names, overrides merged '''
+        if self.name not in self.profiles:
+            raise GatewayError('unknown gateway profile {}, expected one of {}'.format(
+                self.name, ', '.join(sorted(self.profiles))))
+
+        unknown = set(self.overrides) - set(self.profiles[self.name])
+        if unknown:
+            raise GatewayError('unknown gateways in the overrides: {}'.format(', '.join(sorted(unknown))))
+
+        settings = {}
+        for gateway in self.names:
+            merged = copy.deepcopy(self.profiles[self.name][gateway])
+            override = copy.deepcopy(self.overrides.get(gateway) or {})
+            for section, values in (override.pop('resources', None) or {}).items():
+                merged['resources'] = merged['resources'] or {}
+                merged['resources'].setdefault(section, {}).update(values)
+            merged.update(override)
+            # values templated by ansible arrive as strings
+            for key in ('cache', 'workers'):
+                if isinstance(merged.get(key), string_types) and re.match(r'^-?[0-9]+$', merged[key]):
+                    merged[key] = int(merged[key])
+            settings[gateway] = merged
+        return settings
+
+    def validate(self):
+        ''' settings of the profile; raises GatewayError listing every invalid value '''
+        settings = self.settings()
+        errors = []
+        for gateway, gw_settings in sorted(settings.items()):
+            def invalid(key, expected):
+                errors.append('{}.{}: {!r}, expected {}'.format(gateway, key, gw_settings.get(key), expected))
+
+            unknown = set(gw_settings) - set(self.profiles['dev']['prod'])
+            if unknown:
+                errors.append('{}: unknown settings {}'.format(gateway, ', '.join(sorted(unknown))))
+            if gw_settings.get('environment') not in self.environments:
+                invalid('environment', ' | '.join(self.environments))
+            if gw_settings.get('loader') not in self.loaders:
+                invalid('loader', ' | '.join(self.loaders))
+            if gw_settings.get('management_api') is not None \
+                    and gw_settings['management_api'] not in self.management_apis:
+                invalid('management_api', ' | '.join(self.management_apis))
+
+            cache = gw_settings.get('cache')
+            if cache is not None and (isinstance(cache, bool) or not isinstance(cache, int) or cache < -1):
+                invalid('cache', 'seconds, -1 or None')
+            elif cache == 0 and gw_settings.get('loader') == 'boot':
+                invalid('cache', 'a reload interval with the boot loader')
+
+            workers = gw_settings.get('workers')
+            if workers is not None and workers != 'auto' and \
+                    (isinstance(workers, bool) or not isinstance(workers, int) or workers < 1):
+                invalid('workers', 'a positive number, auto or None')
+
+            for section in ('requests', 'limits'):
+                for resource, pattern in sorted(self.quantities.items()):
+                    value = (gw_settings.get('resources') or {}).get(section, {}).get(resource)
+                    if value is not None and not pattern.match(str(value)):
+                        errors.append('{}.resources.{}.{}: invalid quantity {!r}'.format(
+                            gateway, section, resource, value))
+
+        if errors:
+            raise GatewayError('invalid gateway profile {}: {}'.format(self.name, '; '.join(errors)))
+        return settings
+
+    def warnings(self, settings):
+        ''' settings that load the control plane '''
+        return ['{} ({}) fetches its configuration from system-app on every request'.format(
+                    self.names[gateway], gateway)
+                for gateway, gw_settings in sorted(settings.items())
+                if gw_settings['loader'] == 'lazy' and gw_settings['cache'] == 0]
+
+    def instances(self, settings):
+        ''' oc_process instances: template parameters of each gateway '''
+        instances = []
+        for gateway in ('stage', 'prod'):
+            if gateway not in settings:
+                continue
+            gw_settings = settings[gateway]
+            instance = {'APICAST_NAME': self.names[gateway],
+                        'DEPLOYMENT_ENVIRONMENT': gw_settings['environment'],
+                        'CONFIGURATION_LOADER': gw_settings['loader']}
+            if gw_settings['cache'] is not None:
+                instance['CONFIGURATION_CACHE'] = str(gw_settings['cache'])
+            if gw_settings['management_api'] is not None:
+                instance['MANAGEMENT_API'] = gw_settings['management_api']
+            instances.append(instance)
+        return instances
+
+    def edits(self, settings):
+        ''' oc_template_patch edits: workers and resources of each processed gateway that sets them '''
+        edits = []
+        for gateway in ('stage', 'prod'):
+            if gateway not in settings:
+                continue
+            edit = {'kind': 'DeploymentConfig', 'name': self.names[gateway]}
+            if settings[gateway].get('workers') is not None:
+                edit['env'] = {'APICAST_WORKERS': str(settings[gateway]['workers'])}
+            if settings[gateway].get('resources'):
+                edit['resources'] = settings[gateway]['resources']
+            if len(edit) > 2:
+                edits.append(edit)
+        return edits
+
+    def secret(self, endpoint):
+        ''' configuration url secret of the gateways; endpoint is https://<access token>@<admin host> '''
+        return {'apiVersion': 'v1',
+                'kind': 'Secret',
+                'metadata': {'name': self.secret_name},
+                'type': 'Opaque',
+                'stringData': {'password': endpoint}}
+
+    def routes(self, namespace, domain):
+        ''' oc_route routes: the edge route of each gateway, <name>-<namespace>.<domain> '''
+        return [{'name': self.names[gateway],
+                 'host': '{}-{}.{}'.format(self.names[gateway], namespace, domain),
+                 'port': 'proxy',
+                 'tls_termination': 'edge'}
+                for gateway in ('stage', 'prod') if gateway in self.names]
+
+
+class GatewayProvisioner(OpenShiftCLI):
+    ''' Deploys the staging and production APIcast of a tenant in its own namespace
+
+        Does what roles/api_gw does for one tenant, with the same code: the
+        project (ProjectEnsure), the configuration url secret and both
+        gateways of the profile (TemplateProcessor, one oc apply), their routes
+        (RouteBatch, one oc apply, conflicts reported per route), then both
+        gateways are followed with one watch.
+        Safe to call from several threads, one tenant per call.
+    '''
+
+    def __init__(self,
+                 template,
+                 domain,
+                 stage_name='gw-stage',
+                 prod_name='gw-prod',
+                 timeout=300,
+                 report_dir=None,
+                 profile='dev',
+                 profile_overrides=None,
+                 shards=None,
+                 oc_binary=None,
+                 verbose=False):
+        ''' Constructor for GatewayProvisioner '''
+        super(GatewayProvisioner, self).__init__(None, oc_binary=oc_binary, verbose=verbose)
+        self.template = Utils.get_resource_file(template)
+        self.domain = domain
+        self.stage_name = stage_name
+        self.prod_name = prod_name
+        self.timeout = timeout
+        self.report_dir = report_dir
+        self.profile = GatewayProfile(profile, overrides=profile_overrides,
+                                      names={'stage': stage_name, 'prod': prod_name})
+        self.settings = self.profile.validate()
+        self.shards = shards
+
+    def objects(self, tenant, processor):
+        ''' the secret and the gateways of a tenant, as oc_process deploys them for roles/api_gw '''
+        endpoint = 'https://{}@{}'.format(tenant['access_token'], tenant['admin_hostname'])
+        gateways, live, _ = processor.resolve(self.template, self.profile.instances(self.settings))
+        TemplatePatch({'items': gateways}).apply(self.profile.edits(self.settings))
+        TemplateProcessor.keep_live(gateways, live)
+        return [self.profile.secret(endpoint)] + gateways
+
+    def ensure_project(self, namespace):
+        ''' create the namespace unless it exists, like oc_project_ensure; True when created '''
+        project = ProjectEnsure(namespace, oc_binary=self.oc_binary, verbose=self.verbose)
+        try:
+            current = project.get_namespace()
+        except OpenShiftCLIError as err:
+            raise GatewayError('could not get project {}: {}'.format(namespace, err))
+        if current is not None and not ProjectEnsure.terminating(current):
+            return False
+
+        if current is not None:
+            try:
+                ProjectTeardown([namespace], oc_binary=self.oc_binary, verbose=self.verbose).terminate(self.timeout)
+            except ProjectTeardownError as err:
+                raise GatewayError(str(err))
+
+        # --skip-config-write keeps concurrent calls off the kubeconfig
+        rval = project.create(skip_config_write=True)
+        if rval['returncode'] != 0 and 'AlreadyExists' not in rval.get('stderr', '') \
+                and 'already exists' not in rval.get('stderr', ''):
+            raise GatewayError('could not create project {}: {}'.format(namespace, rval.get('stderr', '')))
+        return rval['returncode'] == 0
+
+    def routes(self, namespace):
+        ''' (action per route, conflicts per route, applied names) of the gateway routes, like oc_route '''
+        configs, _ = RouteBatch.from_routes(self.profile.routes(namespace, self.domain),
+                                            namespace,
+                                            self.oc_binary,
+                                            shards=self.shards,
+                                            shard_domain=self.domain)
+        batch = RouteBatch(namespace, configs, oc_binary=self.oc_binary, verbose=self.verbose)
+        return batch.ensure(update=True)
+
+    def provision(self, tenant):
+        ''' deploy and wait for the gateways of one tenant '''
+        namespace = tenant['namespace']
+        rval = {'namespace': namespace, 'changed': False, 'errors': []}
+
+        try:
+            rval['changed'] = self.ensure_project(namespace)
+
+            processor = TemplateProcessor(namespace, oc_binary=self.oc_binary, verbose=self.verbose)
+            api_rval = processor.apply(self.objects(tenant, processor))
+            if api_rval['returncode'] != 0:
+                raise GatewayError('could not create the gateways of {}: {}'.format(
+                    namespace, api_rval.get('stderr', '')))
+            _, actions = TemplateProcessor.summarize([], api_rval['results'])
+            rval['changed'] = rval['changed'] or bool(set(actions) - set(['unchanged']))
+
+            # a route whose host is taken fails the tenant, the other routes and the rollout go on
+            actions, conflicts, pending = self.routes(namespace)
+            rval['routes'] = actions
+            rval['changed'] = rval['changed'] or any([name not in conflicts for name in pending])
+            rval['errors'].extend(['route {}: {}'.format(name, error) for name, error in sorted(conflicts.items())])
+
+            scheduler = RolloutScheduler(namespace, {self.stage_name: [], self.prod_name: []},
+                                         oc_binary=self.oc_binary, verbose=self.verbose)
+            try:
+                scheduler.run(self.timeout)
+            finally:
+                if self.report_dir and scheduler.start is not None:
+                    scheduler.report(os.path.join(self.report_dir, '{}-rollout.json'.format(namespace)))
+            rval['timings'] = scheduler.timings()
+        except (GatewayError, RolloutError, RouteError, TemplateProcessError) as err:
+            rval['errors'].append(str(err))
+
+        return rval